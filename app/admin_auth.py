@@ -0,0 +1,205 @@
+"""Admin authentication: settings, password verification and JWT checks.
+
+Password verification runs off the request threads, with login throttling.
+
+pbkdf2 is CPU-bound on purpose; verifying it in the threadpool that serves
+every other endpoint lets a burst of logins hold the GIL and stall them all.
+Verification runs in a small process pool instead, at most
+ADMIN_VERIFY_MAX_CONCURRENT at a time, and attempts over a per-IP or
+per-username token bucket are refused before any hashing happens.
+
+Admin JWTs that already verified are remembered by digest (up to their expiry)
+so dashboards polling admin endpoints skip the decode.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from time import monotonic, perf_counter, time
+
+import jwt
+from passlib.context import CryptContext
+
+from . import config
+from .auth import SECRET, SESSION_TYP
+from .cache import TTLCache
+from .config import ADMIN_LOGIN_BURST, ADMIN_LOGIN_PER_MINUTE, ADMIN_TOKEN_CACHE_TTL
+from .config import ADMIN_VERIFY_MAX_CONCURRENT, ADMIN_VERIFY_WORKERS
+
+
+class AdminSettings:
+    def __init__(self, user: str | None, password_hash: str | None):
+        self.user = user
+        self.password_hash = password_hash.strip() if password_hash else password_hash
+
+
+_settings = None
+
+
+def load_settings() -> AdminSettings:
+    """(Re)read the admin credentials; called once at startup."""
+    global _settings
+    _settings = AdminSettings(
+        config.ADMIN_USER or os.environ.get("ADMIN_USER"),
+        config.ADMIN_PASSWORD_HASH or os.environ.get("ADMIN_PASSWORD_HASH"),
+    )
+    verified_tokens.clear()
+    return _settings
+
+
+def settings() -> AdminSettings:
+    return _settings or load_settings()
+
+
+# sha256(token) -> claims of admin JWTs that already passed verification
+verified_tokens = TTLCache(max_entries=256, ttl=ADMIN_TOKEN_CACHE_TTL)
+
+
+def verify_token(token: str) -> dict | None:
+    """Claims of a valid admin JWT, or None."""
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = verified_tokens.get(digest)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, SECRET, algorithms=["HS256"])
+        except Exception:
+            return None
+        admin_user = settings().user
+        # author session tokens share the secret but never grant admin
+        if claims.get("typ") == SESSION_TYP or not admin_user or claims.get("sub") != admin_user:
+            return None
+        verified_tokens.set(digest, claims)
+    # a cached entry can outlive the token itself
+    exp = claims.get("exp")
+    if exp is not None and exp <= time():
+        verified_tokens.discard(digest)
+        return None
+    return claims
+
+
+class Busy(Exception):
+    """All verification slots are taken."""
+
+
+class TokenBucketLimiter:
+    """Token bucket per key: `burst` attempts at once, refilled at `per_minute`."""
+
+    def __init__(self, burst: int = ADMIN_LOGIN_BURST, per_minute: float = ADMIN_LOGIN_PER_MINUTE, max_keys: int = 10000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def allow(self, key: str) -> bool:
+        now = monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            else:
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            # forget the least recently seen keys (their buckets would be full again)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+
+class LatencyStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "verifications": self.count,
+                "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+                "max_ms": round(self.max * 1000, 3),
+            }
+
+
+_context = CryptContext(schemes=["pbkdf2_sha256"])
+
+
+def _verify(password: str, hashed: str) -> bool:
+    # runs in the worker process
+    return _context.verify(password, hashed)
+
+
+limiter = TokenBucketLimiter()
+latency = LatencyStats()
+_slots = threading.BoundedSemaphore(ADMIN_VERIFY_MAX_CONCURRENT)
+_executor = None
+_executor_lock = threading.Lock()
+busy_rejections = 0
+
+
+def _mp_context():
+    # never fork: by the first login the server runs the outbox, scheduler and
+    # anyio threads, and a forked child can deadlock on locks they held
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=ADMIN_VERIFY_WORKERS, mp_context=_mp_context())
+        return _executor
+
+
+def allow_attempt(client_ip: str | None, username: str) -> bool:
+    """False if either the client's or the username's bucket is empty."""
+    ip_ok = limiter.allow(f"ip:{client_ip or 'unknown'}")
+    user_ok = limiter.allow(f"user:{username}")
+    return ip_ok and user_ok
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """Check `password` against a pbkdf2 hash in the process pool. Raises Busy when saturated."""
+    global busy_rejections
+    if not _slots.acquire(blocking=False):
+        busy_rejections += 1
+        raise Busy()
+    try:
+        start = perf_counter()
+        ok = await asyncio.get_running_loop().run_in_executor(_pool(), _verify, password, hashed)
+        latency.record(perf_counter() - start)
+        return ok
+    finally:
+        _slots.release()
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def stats() -> dict:
+    return {
+        **latency.stats(),
+        "throttled": limiter.rejected,
+        "busy": busy_rejections,
+        "token_cache": verified_tokens.stats(),
+    }
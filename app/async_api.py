@@ -0,0 +1,124 @@
+"""Async (AsyncSession) versions of the CRUD endpoints.
+
+Mounted by `main` in place of the sync handlers when DATABASE_ASYNC=1, so a
+request waiting on the database no longer occupies a threadpool worker.
+Behaviour and response bodies match the sync endpoints.
+"""
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, database, pagination, serialization, time, versions
+from .cache import weeks_cache
+from .config import PAGE_MAX_LIMIT
+from .deps import get_author_async
+from .models import Goal, UnlinkedMemory
+from .schemas import (
+    GoalCreate,
+    GoalOut,
+    GoalPage,
+    UnlinkedCreate,
+    UnlinkedOut,
+    UnlinkedPage,
+    WeeklyMemoryCreate,
+    WeeklyMemoryOut,
+)
+
+router = APIRouter()
+
+
+async def get_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+
+@router.post("/weekly-memory", response_model=WeeklyMemoryOut)
+async def create_weekly_memory(
+    payload: WeeklyMemoryCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    author: str = Depends(get_author_async),
+):
+    current = time.request_now(request)
+    if not time.can_write(current):
+        raise HTTPException(status_code=403, detail="Not writable now")
+
+    monday = time.week_monday(current)
+    result = await db.execute(crud.weekly_memory_upsert_stmt(db, monday, author, payload.text, current))
+    memory = result.one()
+    await db.execute(versions.bump_stmt(db, versions.WEEKS))
+    await db.commit()
+    weeks_cache.clear()
+    return memory
+
+
+async def _list(db: AsyncSession, model, schema, author: str, limit: int | None, cursor: str | None):
+    fields = tuple(schema.model_fields)
+    page = pagination.requested(limit, cursor)
+    if page is not None:
+        limit, after = page
+        rows = (await db.execute(crud.author_rows_stmt(model, fields, author, after, limit + 1))).all()
+        return pagination.page_response(rows, fields, limit)
+    rows = await db.execute(crud.author_rows_stmt(model, fields, author))
+    if serialization.FAST_JSON:
+        return serialization.rows_response(rows, fields)
+    return [dict(zip(fields, row)) for row in rows]
+
+
+async def _create(db: AsyncSession, model, text: str, author: str):
+    item = model(text=text, author=author, created_at=time.now())
+    db.add(item)
+    await db.commit()
+    # serialise what the database stored, as the sync handlers do
+    await db.refresh(item)
+    return item
+
+
+async def _delete(db: AsyncSession, model, id: int, author: str):
+    result = await db.execute(delete(model).where(model.id == id, model.author == author))
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Not found")
+    await db.commit()
+    return {"ok": True}
+
+
+@router.get("/goals", response_model=list[GoalOut] | GoalPage)
+async def list_goals(
+    db: AsyncSession = Depends(get_db),
+    author: str = Depends(get_author_async),
+    limit: Annotated[int | None, Query(ge=1, le=PAGE_MAX_LIMIT)] = None,
+    cursor: str | None = None,
+):
+    return await _list(db, Goal, GoalOut, author, limit, cursor)
+
+
+@router.post("/goals", response_model=GoalOut)
+async def create_goal(payload: GoalCreate, db: AsyncSession = Depends(get_db), author: str = Depends(get_author_async)):
+    return await _create(db, Goal, payload.text, author)
+
+
+@router.delete("/goals/{id}")
+async def delete_goal(id: int, db: AsyncSession = Depends(get_db), author: str = Depends(get_author_async)):
+    return await _delete(db, Goal, id, author)
+
+
+@router.get("/unlinked", response_model=list[UnlinkedOut] | UnlinkedPage)
+async def list_unlinked(
+    db: AsyncSession = Depends(get_db),
+    author: str = Depends(get_author_async),
+    limit: Annotated[int | None, Query(ge=1, le=PAGE_MAX_LIMIT)] = None,
+    cursor: str | None = None,
+):
+    return await _list(db, UnlinkedMemory, UnlinkedOut, author, limit, cursor)
+
+
+@router.post("/unlinked", response_model=UnlinkedOut)
+async def create_unlinked(payload: UnlinkedCreate, db: AsyncSession = Depends(get_db), author: str = Depends(get_author_async)):
+    return await _create(db, UnlinkedMemory, payload.text, author)
+
+
+@router.delete("/unlinked/{id}")
+async def delete_unlinked(id: int, db: AsyncSession = Depends(get_db), author: str = Depends(get_author_async)):
+    return await _delete(db, UnlinkedMemory, id, author)
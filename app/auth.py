@@ -2,7 +2,11 @@ import os
 import hmac
 import hashlib
 import base64
-from .config import AUTHORS
+from datetime import datetime, timedelta, timezone
+
+import jwt
+
+from .config import AUTHORS, SESSION_TTL_MINUTES
 
 SECRET_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".secret")
 ENV_SECRET = os.environ.get("MEMORIES_SECRET") or os.environ.get("SECRET_KEY")
@@ -45,3 +49,29 @@ def verify_token(token: str) -> str:
         return author
     except Exception:
         raise
+
+
+SESSION_TYP = "session"
+
+
+def create_session_token(author: str, ttl_minutes: int = SESSION_TTL_MINUTES) -> tuple[str, datetime]:
+    """Short-lived signed token for `author`. Returns (token, expires_at)."""
+    expires = datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes)
+    payload = {"sub": author, "typ": SESSION_TYP, "exp": expires}
+    return jwt.encode(payload, SECRET, algorithm="HS256"), expires
+
+
+def is_session_token(token: str) -> bool:
+    # JWTs are three dot-separated segments; HMAC and email tokens have no dots
+    return token.count(".") == 2
+
+
+def verify_session_token(token: str) -> str:
+    """Author of a valid, unexpired session token; raises otherwise."""
+    data = jwt.decode(token, SECRET, algorithms=["HS256"], options={"require": ["exp", "sub"]})
+    if data.get("typ") != SESSION_TYP:
+        raise ValueError("not a session token")
+    author = data["sub"]
+    if author not in AUTHORS:
+        raise ValueError("invalid author")
+    return author
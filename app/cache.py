@@ -0,0 +1,132 @@
+"""Small in-process caches with hit/miss counters.
+
+These are per-process: anything cached here must either be safe to serve
+stale or carry a version in its key (see `versions`).
+"""
+import hashlib
+import math
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from .config import WEEKS_CACHE_ENTRIES, WEEKS_CACHE_MAX_BYTES
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and, for bytes values, total size."""
+
+    def __init__(self, max_entries: int = 128, max_bytes: int | None = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value) -> None:
+        size = len(value) if isinstance(value, (bytes, bytearray)) else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= self._size(old)
+            self._data[key] = value
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= self._size(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    @staticmethod
+    def _size(value) -> int:
+        return len(value) if isinstance(value, (bytes, bytearray)) else 0
+
+
+class TTLCache(LRUCache):
+    """LRUCache whose entries also expire `ttl` seconds after being set."""
+
+    _MISSING = object()
+
+    def __init__(self, max_entries: int = 128, ttl: float = 60.0):
+        super().__init__(max_entries=max_entries)
+        self.ttl = ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING or entry[0] <= monotonic():
+                if entry is not self._MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value) -> None:
+        super().set(key, (monotonic() + self.ttl, value))
+
+    def discard(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over bytes keys (no false negatives)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes):
+        # double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+# Encoded /weeks payloads keyed by (weeks version, first monday, last monday)
+weeks_cache = LRUCache(max_entries=WEEKS_CACHE_ENTRIES, max_bytes=WEEKS_CACHE_MAX_BYTES)
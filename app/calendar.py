@@ -0,0 +1,59 @@
+"""ISO-week calendar shared by /weeks and the write rules.
+
+Each year's list of week Mondays is computed once and memoized; mapping a
+datetime to its (iso_year, index) is plain arithmetic, so nothing here walks
+the calendar per request.
+"""
+from datetime import date, datetime, time as dtime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from .config import TZ_KEY
+
+TZ = ZoneInfo(TZ_KEY)
+
+
+def _local(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=TZ) if dt.tzinfo is None else dt.astimezone(TZ)
+
+
+def weeks_in_year(year: int) -> int:
+    # Dec 28 always falls in the last ISO week of its year
+    return date(year, 12, 28).isocalendar().week
+
+
+@lru_cache(maxsize=64)
+def year_mondays(year: int) -> tuple[datetime, ...]:
+    """Midnight (TZ) of the Monday of every ISO week of `year`."""
+    return tuple(
+        datetime.combine(date.fromisocalendar(year, week, 1), dtime(), tzinfo=TZ)
+        for week in range(1, weeks_in_year(year) + 1)
+    )
+
+
+def iso_year(dt: datetime) -> int:
+    return _local(dt).isocalendar().year
+
+
+def week_index(dt: datetime) -> tuple[int, int]:
+    """(iso_year, index) such that year_mondays(iso_year)[index] is dt's week."""
+    iso = _local(dt).isocalendar()
+    return iso.year, iso.week - 1
+
+
+def week_of(dt: datetime) -> datetime:
+    year, index = week_index(dt)
+    return year_mondays(year)[index]
+
+
+def weeks_between(start: datetime, end: datetime) -> list[datetime]:
+    """Mondays of every week touching the [start, end] interval, in order."""
+    first_year, first = week_index(start)
+    last_year, last = week_index(end)
+    weeks = []
+    for year in range(first_year, last_year + 1):
+        mondays = year_mondays(year)
+        lo = first if year == first_year else 0
+        hi = last + 1 if year == last_year else len(mondays)
+        weeks.extend(mondays[lo:hi])
+    return weeks
@@ -8,6 +8,25 @@ AUTHORS = ["Jaime", "Gabi"]
 # Año activo (año sobre el que se escribe)
 YEAR = 2026
 
+# Máximo de semanas que /weeks devuelve en una consulta from/to
+WEEKS_MAX_RANGE = 54
+
+# Caché en memoria de respuestas /weeks ya serializadas (por proceso)
+WEEKS_CACHE_ENTRIES = int(os.environ.get("WEEKS_CACHE_ENTRIES", "32"))
+WEEKS_CACHE_MAX_BYTES = int(os.environ.get("WEEKS_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# Serialización rápida (orjson + filas pre-formadas) en los endpoints de listas
+FAST_JSON_RESPONSES = os.environ.get("FAST_JSON_RESPONSES", "true").lower() in ("1", "true", "yes")
+
+# Aplicar migraciones de esquema pendientes al arrancar (o usar `python -m app.migrations`)
+MIGRATE_ON_STARTUP = os.environ.get("MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Paginación por cursor de /goals y /unlinked. Con LEGACY_UNPAGINATED_LISTS activo,
+# las peticiones sin `limit` ni `cursor` devuelven la lista completa (compatibilidad).
+LEGACY_UNPAGINATED_LISTS = os.environ.get("LEGACY_UNPAGINATED_LISTS", "true").lower() in ("1", "true", "yes")
+PAGE_DEFAULT_LIMIT = int(os.environ.get("PAGE_DEFAULT_LIMIT", "50"))
+PAGE_MAX_LIMIT = 200
+
 # Timezone a usar (zoneinfo key)
 TZ_KEY = "Europe/Madrid"
 
@@ -29,6 +48,16 @@ EMAIL_FROM = os.environ.get("EMAIL_FROM", "jaimesegurapuig@gmail.com")
 RESEND_API_KEY = os.environ.get("RESEND_API_KEY")
 # Must be a verified sender/domain in Resend
 RESEND_FROM = os.environ.get("RESEND_FROM", EMAIL_FROM)
+RESEND_API_URL = os.environ.get("RESEND_API_URL", "https://api.resend.com")
+# Resend accepts up to 100 messages per /emails/batch call
+RESEND_BATCH_SIZE = 100
+
+# Connection reuse for outgoing mail: SMTP connections kept open (and
+# reconnected on failure) instead of a new handshake + login per message
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", "4"))
+EMAIL_SEND_TIMEOUT = float(os.environ.get("EMAIL_SEND_TIMEOUT", "10"))
+# Envíos SMTP simultáneos al repartir un lote entre destinatarios
+EMAIL_FANOUT_CONCURRENCY = int(os.environ.get("EMAIL_FANOUT_CONCURRENCY", "4"))
 # Recipients mapping: author name -> email address. Update to real addresses.
 # Example: {"Jaime": "jaime@example.com", "Gabi": "gabi@example.com"}
 EMAIL_RECIPIENTS = {
@@ -51,3 +80,52 @@ EXTERNAL_BASE_URL = os.environ.get("EXTERNAL_BASE_URL", "https://segurarodrigue.
 
 ADMIN_USER = os.environ.get("ADMIN_USER")
 ADMIN_PASSWORD_HASH = os.environ.get("ADMIN_PASSWORD_HASH")
+
+# Lifetime of the signed session tokens handed out by POST /session in exchange
+# for a single-use email token (checked in memory, no DB lookup per request)
+SESSION_TTL_MINUTES = int(os.environ.get("SESSION_TTL_MINUTES", "240"))
+
+# Caché negativa de tokens de email (inexistentes, usados o caducados): se
+# rechazan en memoria sin consultar la base de datos durante este tiempo
+TOKEN_NEGATIVE_CACHE_ENTRIES = int(os.environ.get("TOKEN_NEGATIVE_CACHE_ENTRIES", "10000"))
+TOKEN_NEGATIVE_CACHE_TTL = float(os.environ.get("TOKEN_NEGATIVE_CACHE_TTL", "300"))
+# Filtro Bloom opcional de tokens vivos. Solo es exacto si todos los tokens se
+# generan en este proceso; con varios workers, los creados en otro proceso se
+# rechazan hasta la siguiente reconstrucción (cada TOKEN_BLOOM_REFRESH segundos)
+TOKEN_BLOOM_FILTER = os.environ.get("TOKEN_BLOOM_FILTER", "").lower() in ("1", "true", "yes")
+TOKEN_BLOOM_REFRESH = float(os.environ.get("TOKEN_BLOOM_REFRESH", "60"))
+TOKEN_BLOOM_ERROR_RATE = float(os.environ.get("TOKEN_BLOOM_ERROR_RATE", "0.01"))
+
+# Limpieza periódica de tokens de email caducados/usados: borra en lotes de
+# TOKEN_PURGE_BATCH filas (transacciones cortas). Con retención > 0 se conservan
+# los tokens hasta ese número de minutos después de caducar, usados incluidos.
+TOKEN_PURGE_INTERVAL_MINUTES = int(os.environ.get("TOKEN_PURGE_INTERVAL_MINUTES", "60"))
+TOKEN_PURGE_BATCH = int(os.environ.get("TOKEN_PURGE_BATCH", "1000"))
+TOKEN_PURGE_RETENTION_MINUTES = int(os.environ.get("TOKEN_PURGE_RETENTION_MINUTES", "0"))
+
+# Login de admin: pbkdf2 se verifica en un pool de procesos pequeño (no en los
+# hilos que sirven /weeks) con un máximo de verificaciones simultáneas; el resto
+# se rechaza con 429. Además, cubo de tokens por IP y por usuario.
+ADMIN_VERIFY_WORKERS = int(os.environ.get("ADMIN_VERIFY_WORKERS", "1"))
+ADMIN_VERIFY_MAX_CONCURRENT = int(os.environ.get("ADMIN_VERIFY_MAX_CONCURRENT", "2"))
+ADMIN_LOGIN_BURST = int(os.environ.get("ADMIN_LOGIN_BURST", "5"))
+ADMIN_LOGIN_PER_MINUTE = float(os.environ.get("ADMIN_LOGIN_PER_MINUTE", "5"))
+
+# Segundos que un JWT de admin ya verificado se reutiliza sin volver a decodificarlo
+# (nunca más allá de su caducidad)
+ADMIN_TOKEN_CACHE_TTL = float(os.environ.get("ADMIN_TOKEN_CACHE_TTL", "60"))
+
+# Cola de salida de emails (tabla email_outbox): los endpoints y el scheduler
+# encolan y un hilo de fondo envía con reintentos y backoff exponencial
+OUTBOX_WORKER_ENABLED = os.environ.get("OUTBOX_WORKER_ENABLED", "true").lower() in ("1", "true", "yes")
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_SECONDS = float(os.environ.get("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.environ.get("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+# un envío "sending" más antiguo que esto (worker caído) vuelve a reclamarse
+OUTBOX_CLAIM_TIMEOUT_SECONDS = float(os.environ.get("OUTBOX_CLAIM_TIMEOUT_SECONDS", "300"))
+
+# Líder del scheduler: con varios workers/réplicas solo el que tiene el lease
+# ejecuta los jobs. Si el líder cae, otro lo toma cuando el lease caduca.
+SCHEDULER_LEASE_TTL_SECONDS = float(os.environ.get("SCHEDULER_LEASE_TTL_SECONDS", "60"))
@@ -0,0 +1,76 @@
+"""Dialect-aware statement builders shared by the endpoints and batch jobs."""
+from datetime import datetime
+
+from typing import Sequence
+
+from sqlalchemy import Table, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import WeeklyMemory
+
+
+class UnsupportedBackend(Exception):
+    """The database has no ON CONFLICT insert construct wired up here."""
+
+
+def dialect_insert(db, table: Table):
+    """`INSERT` construct supporting ON CONFLICT for the session's backend.
+
+    Works for both Session and AsyncSession (whose get_bind() is the sync engine).
+    """
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return postgresql.insert(table)
+    if name == "sqlite":
+        return sqlite.insert(table)
+    raise UnsupportedBackend(f"upserts not supported on {name}")
+
+
+def weekly_memory_upsert_stmt(db, week_monday: datetime, author: str, text: str, now: datetime):
+    """INSERT ... ON CONFLICT (week_monday, author) DO UPDATE ... RETURNING the stored row.
+
+    `db` may be a Session or an AsyncSession; it is only used to pick the dialect.
+    """
+    stmt = dialect_insert(db, WeeklyMemory.__table__).values(
+        week_monday=week_monday,
+        author=author,
+        text=text,
+        created_at=now,
+        updated_at=now,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[WeeklyMemory.week_monday, WeeklyMemory.author],
+        set_={"text": stmt.excluded.text, "updated_at": stmt.excluded.updated_at},
+    ).returning(
+        WeeklyMemory.week_monday,
+        WeeklyMemory.text,
+        WeeklyMemory.author,
+        WeeklyMemory.created_at,
+        WeeklyMemory.updated_at,
+    )
+
+
+def upsert_weekly_memory(db: Session, week_monday: datetime, author: str, text: str, now: datetime):
+    """Insert or update the author's memory for a week in one statement.
+
+    Returns the stored row (created_at is kept on update). The caller commits.
+    """
+    return db.execute(weekly_memory_upsert_stmt(db, week_monday, author, text, now)).one()
+
+
+def author_rows_stmt(model, fields: Sequence[str], author: str, after=None, limit: int | None = None):
+    """Column-only SELECT of `fields` for the author's rows, newest first.
+
+    `after` is a (created_at, id) keyset position; rows strictly older are returned.
+    """
+    stmt = (
+        select(*(getattr(model, f) for f in fields))
+        .where(model.author == author)
+        .order_by(model.created_at.desc(), model.id.desc())
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(*after))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
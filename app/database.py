@@ -1,6 +1,10 @@
 import os
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 
 DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./memories.db")
 
@@ -8,11 +12,203 @@ DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./memories.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-engine_kwargs = {}
-if DATABASE_URL.startswith("sqlite"):
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
+# SQLite engine profile: "production" applies WAL and the pragmas below on every new
+# connection and pairs them with a sized connection pool; "default" keeps the driver
+# defaults (rollback journal, synchronous=FULL, one writer blocks all readers).
+SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "production")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", "16384"))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024)))
+SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "8"))
+SQLITE_MAX_OVERFLOW = int(os.environ.get("SQLITE_MAX_OVERFLOW", "8"))
 
-engine = create_engine(DATABASE_URL, **engine_kwargs)
+# Postgres pool: Railway drops idle connections, so recycle them and ping on checkout
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# 0 disables the server-side statement timeout
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+
+class PoolStats:
+    """Checkout counters shared by a pool and the pools it is recreated into."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.saturated = 0
+        self.timeouts = 0
+
+    def record(self, wait: float, saturated: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if saturated:
+                self.saturated += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that measures how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        # saturated: this checkout took the last connection the pool may open
+        capacity = self.size() + max(self._max_overflow, 0)
+        self.stats.record(time.perf_counter() - start, self.checkedout() >= capacity)
+        return conn
+
+    def recreate(self):
+        new = super().recreate()
+        new.stats = self.stats
+        return new
+
+
+def _is_sqlite_file(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and not url.rstrip("/").endswith(":")
+
+
+def sqlite_pragmas() -> list[str]:
+    return [
+        "PRAGMA journal_mode=WAL",
+        # WAL + NORMAL: durable against app crashes, fsync only at checkpoints
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        # negative cache_size is in KiB
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def engine_options(url: str, sqlite_profile: str | None = None) -> dict:
+    """Keyword arguments for create_engine() for the given URL and profile."""
+    profile = sqlite_profile or SQLITE_PROFILE
+    options = {}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {
+            "check_same_thread": False,
+            # the driver waits on locks itself before raising "database is locked"
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+        if profile == "production" and _is_sqlite_file(url):
+            # WAL lets readers proceed during a write: keep enough connections
+            # for concurrent readers, but don't hold more than needed when idle.
+            options.update(
+                poolclass=InstrumentedQueuePool,
+                pool_size=SQLITE_POOL_SIZE,
+                max_overflow=SQLITE_MAX_OVERFLOW,
+                pool_timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+            )
+    elif url.startswith("postgresql"):
+        options.update(
+            poolclass=InstrumentedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+        if DB_STATEMENT_TIMEOUT_MS:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def build_engine(url: str, sqlite_profile: str | None = None, **overrides):
+    profile = sqlite_profile or SQLITE_PROFILE
+    eng = create_engine(url, **{**engine_options(url, profile), **overrides})
+    if profile == "production" and _is_sqlite_file(url):
+        event.listen(eng, "connect", _apply_sqlite_pragmas)
+    return eng
+
+
+engine = build_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine)
 
+
+def pool_stats(eng=None) -> dict:
+    """Pool occupancy and checkout wait/saturation counters for reporting."""
+    pool = (eng or engine).pool
+    data = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        data.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        data.update(
+            checkouts=stats.checkouts,
+            avg_wait_ms=round(stats.total_wait / stats.checkouts * 1000, 3) if stats.checkouts else 0.0,
+            max_wait_ms=round(stats.max_wait * 1000, 3),
+            saturated=stats.saturated,
+            timeouts=stats.timeouts,
+        )
+    return data
+
+# Optional async engine for the CRUD endpoints (asyncpg / aiosqlite), enabled with
+# DATABASE_ASYNC=1. The sync engine stays available for scripts and the scheduler.
+DATABASE_ASYNC = os.environ.get("DATABASE_ASYNC", "").lower() in ("1", "true", "yes")
+
+
+def async_url(url: str) -> str:
+    """Map a sync DATABASE_URL to its async driver."""
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    if backend == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if backend == "postgresql":
+        return f"postgresql+asyncpg://{rest}"
+    raise ValueError(f"No async driver configured for {scheme}")
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_kwargs = {}
+    if DATABASE_URL.startswith("postgresql"):
+        async_kwargs = dict(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+        if DB_STATEMENT_TIMEOUT_MS:
+            async_kwargs["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+    async_engine = create_async_engine(async_url(DATABASE_URL), **async_kwargs)
+    if SQLITE_PROFILE == "production" and _is_sqlite_file(DATABASE_URL):
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 Base = declarative_base()
@@ -1,8 +1,9 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .auth import verify_token
-from .tokens import consume_email_token
+from .auth import is_session_token, verify_session_token, verify_token
+from .tokens import consume_email_token, aconsume_email_token
 from .config import AUTHORS
+from . import admin_auth
 
 security = HTTPBearer(auto_error=False)
 
@@ -11,6 +12,12 @@ def get_author(credentials: HTTPAuthorizationCredentials = Depends(security)) ->
     if credentials is None:
         raise HTTPException(status_code=401, detail="Missing token")
     token = credentials.credentials
+    if is_session_token(token):
+        # Signed session token from POST /session: checked in memory, no DB
+        try:
+            return verify_session_token(token)
+        except Exception:
+            raise HTTPException(status_code=401, detail="Invalid token")
     try:
         # First try HMAC-signed persistent tokens
         try:
@@ -28,3 +35,39 @@ def get_author(credentials: HTTPAuthorizationCredentials = Depends(security)) ->
             return author
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+
+
+
+async def get_author_async(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    """Same as get_author, consuming DB-backed tokens through the async engine."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Missing token")
+    token = credentials.credentials
+    if is_session_token(token):
+        try:
+            return verify_session_token(token)
+        except Exception:
+            raise HTTPException(status_code=401, detail="Invalid token")
+    try:
+        author = verify_token(token)
+    except Exception:
+        # Not a HMAC token — try consuming a DB-backed single-use token
+        try:
+            author = await aconsume_email_token(token)
+        except Exception:
+            author = None
+    if not author or author not in AUTHORS:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return author
+
+
+def require_admin(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Claims of the admin JWT in the Authorization header; 401/503 otherwise."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Missing Authorization header")
+    if not admin_auth.settings().user:
+        raise HTTPException(status_code=503, detail="Admin not configured")
+    claims = admin_auth.verify_token(credentials.credentials)
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    return claims
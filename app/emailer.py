@@ -1,78 +1,91 @@
-from email.message import EmailMessage
-import smtplib
 import os
-from typing import Optional
+import threading
 from .config import (
     EMAILS_ENABLED,
     SMTP_HOST,
     SMTP_PORT,
     SMTP_USE_TLS,
     SMTP_USER,
+    SMTP_POOL_SIZE,
     EMAIL_FROM,
     EMAIL_RECIPIENTS,
     RESEND_API_KEY,
     RESEND_FROM,
+    RESEND_API_URL,
 )
-import requests
+import time as _time
+from .fanout import UNKNOWN, SendResult, fan_out
+from .mail_transport import OutgoingEmail, ResendTransport, SMTPTransport
 
+_transport = None
+_transport_lock = threading.Lock()
 
-def send_email(subject: str, body: str, to: str) -> bool:
-    """Send a simple plain-text email. Returns True on success, False otherwise.
 
-    This function is safe to call even when EMAILS_ENABLED is False — it will
-    only log/skip sending.
+def get_transport():
+    """Shared transport for the configured provider (Resend preferred), or None."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            if RESEND_API_KEY:
+                _transport = ResendTransport(RESEND_API_KEY, RESEND_FROM, base_url=RESEND_API_URL)
+            elif SMTP_HOST:
+                _transport = SMTPTransport(
+                    SMTP_HOST,
+                    SMTP_PORT,
+                    EMAIL_FROM,
+                    use_tls=SMTP_USE_TLS,
+                    user=SMTP_USER,
+                    password=os.environ.get("SMTP_PASSWORD"),
+                    pool_size=SMTP_POOL_SIZE,
+                )
+        return _transport
+
+
+def close_transport() -> None:
+    global _transport
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+            _transport = None
+
+
+def deliver(emails: list[OutgoingEmail]) -> list[SendResult]:
+    """Send several plain-text emails over the shared transport; one timed result each.
+
+    Resend gets them in one batch call; over SMTP they fan out concurrently
+    across the pooled connections. A result whose `unknown` is set may still
+    have been delivered and must not be retried straight away.
     """
+    if not emails:
+        return []
     if not EMAILS_ENABLED:
         # In dev the caller can log or mock this call — don't raise.
-        print(f"[emailer] EMAILS_ENABLED is False, skipping send to {to}: {subject}")
-        return False
+        for e in emails:
+            print(f"[emailer] EMAILS_ENABLED is False, skipping send to {e.to}: {e.subject}")
+        return [SendResult(e.to, False, 0.0, "emails disabled") for e in emails]
 
-    if not SMTP_HOST and not RESEND_API_KEY:
+    transport = get_transport()
+    if transport is None:
         print("[emailer] SMTP_HOST not configured, skipping send")
-        return False
+        return [SendResult(e.to, False, 0.0, "no transport configured") for e in emails]
+    if isinstance(transport, ResendTransport) and len(emails) > 1:
+        start = _time.perf_counter()
+        flags = transport.send_many(emails)
+        elapsed = round((_time.perf_counter() - start) * 1000, 3)
+        errors = {True: None, False: "send failed", None: UNKNOWN}
+        return [SendResult(e.to, bool(ok), elapsed, errors[ok]) for e, ok in zip(emails, flags)]
+    return fan_out(transport.send, emails)
+
 
-    # Prefer Resend if configured.
-    if RESEND_API_KEY:
-        try:
-            resp = requests.post(
-                "https://api.resend.com/emails",
-                headers={"Authorization": f"Bearer {RESEND_API_KEY}"},
-                json={
-                    "from": RESEND_FROM,
-                    "to": [to],
-                    "subject": subject,
-                    "text": body,
-                },
-                timeout=10,
-            )
-            if 200 <= resp.status_code < 300:
-                return True
-            print(f"[emailer] Resend error {resp.status_code}: {resp.text}")
-            return False
-        except Exception as e:
-            print(f"[emailer] Resend exception: {e}")
-            return False
+def send_emails(emails: list[OutgoingEmail]) -> list[bool]:
+    """Success flag per email; see deliver()."""
+    return [r.ok for r in deliver(emails)]
 
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = EMAIL_FROM
-    msg["To"] = to
-    msg.set_content(body)
 
-    password = os.environ.get("SMTP_PASSWORD")
-    try:
-        if SMTP_USE_TLS:
-            with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as s:
-                s.starttls()
-                if SMTP_USER and password:
-                    s.login(SMTP_USER, password)
-                s.send_message(msg)
-        else:
-            with smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=10) as s:
-                if SMTP_USER and password:
-                    s.login(SMTP_USER, password)
-                s.send_message(msg)
-        return True
-    except Exception as e:
-        print(f"[emailer] Error sending email to {to}: {e}")
-        return False
+def send_email(subject: str, body: str, to: str) -> bool:
+    """Send a simple plain-text email. Returns True on success, False otherwise.
+
+    This function is safe to call even when EMAILS_ENABLED is False — it will
+    only log/skip sending.
+    """
+    return send_emails([OutgoingEmail(subject, body, to)])[0]
@@ -0,0 +1,102 @@
+"""Streaming export of every weekly memory, goal and unlinked memory.
+
+Rows are read with server-side cursors (`yield_per`, which implies
+`stream_results`) and encoded in ~64 KiB chunks, optionally gzipped on the
+fly, so memory use stays flat and the first bytes go out immediately no
+matter how much history there is. Used by GET /admin/export and
+scripts/export_memories.py.
+"""
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from sqlalchemy import select
+
+from . import database, serialization
+from .models import Goal, UnlinkedMemory, WeeklyMemory
+
+FORMATS = ("ndjson", "csv")
+
+# (record type, model, exported columns); WeeklyMemory first so imports can replay in order
+EXPORT_TABLES = [
+    ("weekly_memory", WeeklyMemory, ("id", "week_monday", "author", "text", "created_at", "updated_at")),
+    ("goal", Goal, ("id", "author", "text", "created_at")),
+    ("unlinked", UnlinkedMemory, ("id", "author", "text", "created_at")),
+]
+CSV_COLUMNS = ["type", "id", "week_monday", "author", "text", "created_at", "updated_at"]
+
+CHUNK_BYTES = 64 * 1024
+YIELD_PER = 500
+
+
+def iter_records(db, yield_per: int = YIELD_PER) -> Iterator[dict]:
+    for kind, model, columns in EXPORT_TABLES:
+        stmt = (
+            select(*(getattr(model, c) for c in columns))
+            .order_by(model.id)
+            .execution_options(yield_per=yield_per)
+        )
+        for row in db.execute(stmt):
+            record = {"type": kind}
+            record.update(zip(columns, row))
+            yield record
+
+
+def ndjson_chunks(records: Iterable[dict]) -> Iterator[bytes]:
+    buf = bytearray()
+    for record in records:
+        buf += serialization.dumps(record)
+        buf += b"\n"
+        if len(buf) >= CHUNK_BYTES:
+            yield bytes(buf)
+            buf.clear()
+    if buf:
+        yield bytes(buf)
+
+
+def csv_chunks(records: Iterable[dict]) -> Iterator[bytes]:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    for record in records:
+        writer.writerow({
+            k: serialization.isoformat(v) if isinstance(v, datetime) else v
+            for k, v in record.items()
+        })
+        if out.tell() >= CHUNK_BYTES:
+            yield out.getvalue().encode("utf-8")
+            out.seek(0)
+            out.truncate()
+    if out.tell():
+        yield out.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(fmt: str = "ndjson", gzip: bool = False) -> Iterator[bytes]:
+    """Encoded export chunks. Opens (and closes) its own session, so it can
+    outlive the request's dependencies inside a StreamingResponse."""
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}")
+    db = database.SessionLocal()
+    try:
+        records = iter_records(db)
+        chunks = ndjson_chunks(records) if fmt == "ndjson" else csv_chunks(records)
+        if gzip:
+            chunks = gzip_chunks(chunks)
+        yield from chunks
+    finally:
+        db.close()
+
+
+def filename(fmt: str, gzip: bool, now: datetime) -> str:
+    return f"memories-{now:%Y%m%d-%H%M%S}.{fmt}" + (".gz" if gzip else "")
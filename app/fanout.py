@@ -0,0 +1,87 @@
+"""Send one message per recipient concurrently, with a cap and a per-send timeout."""
+import time as _time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, NamedTuple
+
+from .config import EMAIL_FANOUT_CONCURRENCY, EMAIL_SEND_TIMEOUT
+from .mail_transport import DeliveryUnknown, OutgoingEmail
+
+# error of a send that timed out or broke after the message was handed over
+UNKNOWN = "unknown"
+
+
+class SendResult(NamedTuple):
+    to: str
+    ok: bool
+    elapsed_ms: float
+    error: str | None = None
+
+    @property
+    def unknown(self) -> bool:
+        """The message may or may not have gone out, so retrying it could send it twice."""
+        return self.error == UNKNOWN
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+def _timed(send: Callable[[OutgoingEmail], bool], email: OutgoingEmail, started: list, i: int) -> SendResult:
+    start = started[i] = _time.perf_counter()
+    try:
+        ok = bool(send(email))
+        error = None if ok else "send failed"
+    except DeliveryUnknown:
+        ok, error = False, UNKNOWN
+    except Exception as e:
+        ok, error = False, str(e)
+    return SendResult(email.to, ok, round((_time.perf_counter() - start) * 1000, 3), error)
+
+
+def fan_out(
+    send: Callable[[OutgoingEmail], bool],
+    emails: list[OutgoingEmail],
+    concurrency: int = EMAIL_FANOUT_CONCURRENCY,
+    timeout: float = EMAIL_SEND_TIMEOUT,
+) -> list[SendResult]:
+    """Call `send` for every email on up to `concurrency` threads; results keep input order.
+
+    Each send has its own deadline, `timeout` seconds after it starts, so a
+    slow send never eats into the time of the ones queued behind it (the
+    transports' socket timeouts, which default to the same value, end the
+    network calls). A send still running at its deadline may yet deliver:
+    it is reported as UNKNOWN, never as a plain failure. If every worker is
+    stuck past its deadline, sends that never started are reported as
+    "not sent".
+    """
+    if not emails:
+        return []
+    workers = max(1, min(concurrency, len(emails)))
+    started = [None] * len(emails)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="email-fanout")
+    try:
+        futures = [pool.submit(_timed, send, e, started, i) for i, e in enumerate(emails)]
+        pending = set(range(len(emails)))
+        while pending:
+            now = _time.perf_counter()
+            deadlines = [started[i] + timeout for i in pending if started[i] is not None]
+            live = [d for d in deadlines if d > now]
+            overdue = len(deadlines) - len(live)
+            if overdue == len(pending) or overdue >= workers:
+                break
+            wait([futures[i] for i in pending], timeout=(min(live) if live else now + timeout) - now,
+                 return_when=FIRST_COMPLETED)
+            pending = {i for i in pending if not futures[i].done()}
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for i, (email, future) in enumerate(zip(emails, futures)):
+        if future.cancelled():
+            results.append(SendResult(email.to, False, 0.0, "not sent"))
+        elif future.done():
+            results.append(future.result())
+        else:
+            begun = started[i] if started[i] is not None else _time.perf_counter()
+            elapsed = round((_time.perf_counter() - begun) * 1000, 3)
+            results.append(SendResult(email.to, False, elapsed, UNKNOWN))
+    return results
@@ -0,0 +1,202 @@
+"""Bulk import of NDJSON records (the shape produced by `export`).
+
+Records are validated and written in batches: one transaction and one
+multi-row INSERT per table per batch. Weekly memories are upserted on the
+(week_monday, author) constraint and goals / unlinked memories on the
+exported `id`, so re-importing a file (or restoring a backup over the same
+database) never duplicates rows. Records without an `id` are always added.
+Import is an admin operation and ignores the Sunday-only `can_write` rule.
+"""
+import json
+import time as _time
+from datetime import datetime
+from typing import Iterable, Iterator, Literal
+
+from pydantic import BaseModel, ValidationError, field_validator
+from sqlalchemy import func, insert, select
+
+from . import crud, database, time, versions
+from .cache import weeks_cache
+from .config import AUTHORS
+from .models import Goal, UnlinkedMemory, WeeklyMemory
+
+DEFAULT_BATCH_SIZE = 500
+# keeps the multi-row weekly VALUES (5 columns per row) under SQLite's
+# 32766 bound-parameter limit
+MAX_BATCH_SIZE = 5000
+
+
+class _Record(BaseModel):
+    id: int | None = None
+    author: str
+    text: str
+    created_at: datetime
+
+    @field_validator("author")
+    @classmethod
+    def known_author(cls, v):
+        if v not in AUTHORS:
+            raise ValueError(f"unknown author {v!r}")
+        return v
+
+    @field_validator("text")
+    @classmethod
+    def not_empty(cls, v):
+        if not v.strip():
+            raise ValueError("empty text")
+        return v
+
+
+class WeeklyMemoryRecord(_Record):
+    type: Literal["weekly_memory"]
+    week_monday: datetime
+    updated_at: datetime | None = None
+
+
+class GoalRecord(_Record):
+    type: Literal["goal"]
+
+
+class UnlinkedRecord(_Record):
+    type: Literal["unlinked"]
+
+
+RECORD_TYPES = {
+    "weekly_memory": WeeklyMemoryRecord,
+    "goal": GoalRecord,
+    "unlinked": UnlinkedRecord,
+}
+
+
+def _batches(lines: Iterable, size: int) -> Iterator[list[tuple[int, object]]]:
+    batch = []
+    for lineno, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        batch.append((lineno, line))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _describe(e: ValidationError) -> str:
+    # "created_at: Input should be a valid datetime; text: Value error, empty text"
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'record'}: {err['msg']}" for err in e.errors())
+
+
+def _validate(batch, errors: list) -> list:
+    records = []
+    for lineno, line in batch:
+        try:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            kind = data.get("type")
+            if not isinstance(kind, str) or kind not in RECORD_TYPES:
+                raise ValueError(f"unknown type {kind!r}")
+            records.append(RECORD_TYPES[kind].model_validate(data))
+        except ValidationError as e:
+            errors.append({"line": lineno, "error": _describe(e)})
+        except ValueError as e:
+            errors.append({"line": lineno, "error": str(e).splitlines()[0]})
+    return records
+
+
+def _upsert_by_id(db, model, rows: dict) -> None:
+    stmt = crud.dialect_insert(db, model.__table__).values(list(rows.values()))
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[model.id],
+        set_={"author": stmt.excluded.author, "text": stmt.excluded.text, "created_at": stmt.excluded.created_at},
+    ))
+    if db.get_bind().dialect.name == "postgresql":
+        # explicit ids do not advance the serial sequence: move it past them
+        # so later inserts through the API do not collide
+        table = model.__tablename__
+        db.execute(
+            select(func.setval(func.pg_get_serial_sequence(table, "id"), select(func.max(model.id)).scalar_subquery()))
+        )
+
+
+def _write(db, records: list) -> dict:
+    weekly = {}
+    # goals / unlinked memories by exported id; records without one are new rows
+    with_id = {Goal: {}, UnlinkedMemory: {}}
+    without_id = {Goal: [], UnlinkedMemory: []}
+    for r in records:
+        if isinstance(r, WeeklyMemoryRecord):
+            monday = time.week_monday(time.localize(r.week_monday))
+            # last record wins: one VALUES row per key, as ON CONFLICT requires
+            weekly[(monday, r.author)] = {
+                "week_monday": monday,
+                "author": r.author,
+                "text": r.text,
+                "created_at": r.created_at,
+                "updated_at": r.updated_at or r.created_at,
+            }
+        else:
+            model = Goal if isinstance(r, GoalRecord) else UnlinkedMemory
+            row = {"author": r.author, "text": r.text, "created_at": r.created_at}
+            if r.id is None:
+                without_id[model].append(row)
+            else:
+                with_id[model][r.id] = {"id": r.id, **row}
+
+    if weekly:
+        stmt = crud.dialect_insert(db, WeeklyMemory.__table__).values(list(weekly.values()))
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[WeeklyMemory.week_monday, WeeklyMemory.author],
+            set_={"text": stmt.excluded.text, "updated_at": stmt.excluded.updated_at},
+        ))
+        versions.bump(db, versions.WEEKS)
+    for model in (Goal, UnlinkedMemory):
+        if with_id[model]:
+            _upsert_by_id(db, model, with_id[model])
+        if without_id[model]:
+            db.execute(insert(model), without_id[model])
+    return {
+        "weekly_memories": len(weekly),
+        "goals": len(with_id[Goal]) + len(without_id[Goal]),
+        "unlinked": len(with_id[UnlinkedMemory]) + len(without_id[UnlinkedMemory]),
+    }
+
+
+def import_lines(lines: Iterable, batch_size: int = DEFAULT_BATCH_SIZE, on_batch=None) -> dict:
+    """Import NDJSON lines; returns totals, per-batch throughput and invalid lines.
+
+    `on_batch(report)` is called after each committed batch (used by the CLI).
+    """
+    totals = {"weekly_memories": 0, "goals": 0, "unlinked": 0}
+    batches, errors = [], []
+    wrote_weeks = False
+    db = database.SessionLocal()
+    try:
+        for n, batch in enumerate(_batches(lines, batch_size), 1):
+            start = _time.perf_counter()
+            invalid_before = len(errors)
+            records = _validate(batch, errors)
+            counts = _write(db, records)
+            db.commit()
+            elapsed = _time.perf_counter() - start
+
+            wrote_weeks = wrote_weeks or counts["weekly_memories"] > 0
+            for k, v in counts.items():
+                totals[k] += v
+            report = {
+                "batch": n,
+                "rows": len(records),
+                "invalid": len(errors) - invalid_before,
+                "seconds": round(elapsed, 4),
+                "rows_per_s": round(len(records) / elapsed, 1) if elapsed else None,
+            }
+            batches.append(report)
+            if on_batch:
+                on_batch(report)
+    finally:
+        db.close()
+        if wrote_weeks:
+            weeks_cache.clear()
+    return {"imported": totals, "batches": batches, "errors": errors}
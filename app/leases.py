@@ -0,0 +1,141 @@
+"""Cross-process leader election for scheduled jobs.
+
+Every replica runs the scheduler, but a job only does its work in the process
+holding the named lease:
+
+- Postgres: a session-level `pg_try_advisory_lock` on a dedicated connection,
+  opened outside the application's pool so it never takes one of its slots.
+  The server releases it when that connection dies, so a crashed leader is
+  replaced on the next renewal by another replica.
+- SQLite (and anything else): a row in `scheduler_leases` with an expiry,
+  taken or renewed by a conditional UPDATE (holder is us, or the lease has
+  expired) and created by an INSERT the first time. A leader that stops
+  renewing loses it after `ttl` seconds.
+"""
+import hashlib
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, or_, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import NullPool
+
+from . import database
+from .config import SCHEDULER_LEASE_TTL_SECONDS
+from .models import SchedulerLease
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _advisory_key(name: str) -> int:
+    # stable signed 64-bit key per lease name
+    return int.from_bytes(hashlib.sha256(f"lease:{name}".encode()).digest()[:8], "big", signed=True)
+
+
+class LeaderLease:
+    def __init__(self, name: str, ttl: float = SCHEDULER_LEASE_TTL_SECONDS, engine=None, holder: str | None = None):
+        self.name = name
+        self.ttl = ttl
+        self.engine = engine or database.engine
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._conn = None  # Postgres: connection holding the advisory lock
+        self._lock_engine = None
+        self._lock = threading.Lock()
+
+    def _dedicated_engine(self):
+        # one unpooled connection at a time, held for as long as we lead
+        if self._lock_engine is None:
+            self._lock_engine = create_engine(self.engine.url, poolclass=NullPool)
+        return self._lock_engine
+
+    def acquire_or_renew(self) -> bool:
+        """Take the lease if free or expired, extend it if already ours. Returns is_leader."""
+        with self._lock:
+            try:
+                if self.engine.dialect.name == "postgresql":
+                    self.is_leader = self._advisory()
+                else:
+                    self.is_leader = self._lease_row()
+            except Exception as e:
+                # can't reach the DB: assume we lost it rather than risk two leaders
+                print(f"[leases] {self.name}: renewal failed: {e}")
+                self.is_leader = False
+            return self.is_leader
+
+    def _advisory(self) -> bool:
+        if self._conn is not None:
+            try:
+                # still connected means still locked
+                self._conn.execute(text("SELECT 1"))
+                self._conn.commit()
+                return True
+            except Exception:
+                self._close_conn()
+        conn = self._dedicated_engine().connect()
+        try:
+            got = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _advisory_key(self.name)}).scalar()
+            conn.commit()
+        except Exception:
+            conn.close()
+            raise
+        if got:
+            self._conn = conn
+            return True
+        conn.close()
+        return False
+
+    def _lease_row(self) -> bool:
+        now = _utcnow()
+        expires = now + timedelta(seconds=self.ttl)
+        table = SchedulerLease.__table__
+        with self.engine.begin() as conn:
+            taken = conn.execute(
+                update(table)
+                .where(table.c.name == self.name, or_(table.c.holder == self.holder, table.c.expires_at < now))
+                .values(holder=self.holder, expires_at=expires)
+            ).rowcount
+        if taken:
+            return True
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(table.insert().values(name=self.name, holder=self.holder, expires_at=expires))
+        except IntegrityError:
+            # someone else holds a live lease
+            return False
+        return True
+
+    def _close_conn(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def release(self) -> None:
+        """Give the lease up now instead of letting it expire."""
+        with self._lock:
+            try:
+                if self.engine.dialect.name == "postgresql":
+                    if self._conn is not None:
+                        self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _advisory_key(self.name)})
+                        self._conn.commit()
+                elif self.is_leader:
+                    table = SchedulerLease.__table__
+                    with self.engine.begin() as conn:
+                        conn.execute(
+                            update(table)
+                            .where(table.c.name == self.name, table.c.holder == self.holder)
+                            .values(expires_at=_utcnow())
+                        )
+            except Exception as e:
+                print(f"[leases] {self.name}: release failed: {e}")
+            finally:
+                self._close_conn()
+                self.is_leader = False
@@ -0,0 +1,202 @@
+"""Reusable connections for outgoing email.
+
+`emailer` used to open a new SMTP connection (STARTTLS + login) or a new
+HTTPS connection to Resend for every message. The transports here keep them:
+SMTP connections live in a small pool and are re-established when the server
+drops them; Resend calls share one keep-alive `requests.Session` and many
+messages go out in a single /emails/batch request.
+"""
+import queue
+import smtplib
+import threading
+from email.message import EmailMessage
+from typing import NamedTuple
+
+import requests
+
+from .config import EMAIL_SEND_TIMEOUT, RESEND_BATCH_SIZE
+
+
+class DeliveryUnknown(Exception):
+    """The connection failed after the message was handed over: it may have been delivered."""
+
+
+class OutgoingEmail(NamedTuple):
+    subject: str
+    body: str
+    to: str
+
+
+class _SMTP(smtplib.SMTP):
+    """smtplib.SMTP that notes whether DATA was issued for the current message."""
+
+    data_sent = False
+
+    def data(self, msg):
+        self.data_sent = True
+        return super().data(msg)
+
+
+class SMTPTransport:
+    """Pool of up to `pool_size` persistent SMTP connections."""
+
+    def __init__(self, host, port, sender, use_tls=True, user=None, password=None,
+                 pool_size=2, timeout=EMAIL_SEND_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.use_tls = use_tls
+        self.user = user
+        self.password = password
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self.connects = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = _SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                conn.starttls()
+            if self.user and self.password:
+                conn.login(self.user, self.password)
+        except Exception:
+            self._discard(conn)
+            raise
+        self.connects += 1
+        return conn
+
+    def _message(self, email: OutgoingEmail) -> EmailMessage:
+        msg = EmailMessage()
+        msg["Subject"] = email.subject
+        msg["From"] = self.sender
+        msg["To"] = email.to
+        msg.set_content(email.body)
+        return msg
+
+    @staticmethod
+    def _discard(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def send(self, email: OutgoingEmail) -> bool:
+        """Send over a pooled connection; False if it was not sent.
+
+        Raises DeliveryUnknown when the connection broke (or timed out)
+        after DATA: the server may already have accepted the message.
+        """
+        msg = self._message(email)
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = None
+            # a pooled connection may have been closed by the server while idle:
+            # retry once on a fresh one, but only if DATA was never issued
+            for attempt in range(2):
+                try:
+                    if conn is None:
+                        conn = self._connect()
+                    conn.data_sent = False
+                    conn.send_message(msg)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                    # the server answered and rejected the message (smtplib has
+                    # already sent RSET): the connection itself is still usable
+                    print(f"[mail] SMTP error sending to {email.to}: {e}")
+                    if conn is not None:
+                        self._idle.put(conn)
+                    return False
+                except (smtplib.SMTPServerDisconnected, OSError) as e:
+                    # SMTPException subclasses OSError: only a dropped connection or a
+                    # socket error is worth a retry, and never once DATA went out
+                    # (the server may already have accepted the message)
+                    transient = isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException)
+                    sent_data = transient and conn is not None and conn.data_sent
+                    retry = attempt == 0 and transient and not sent_data
+                    if conn is not None:
+                        self._discard(conn)
+                        conn = None
+                    if not retry:
+                        print(f"[mail] SMTP error sending to {email.to}: {e}")
+                        if sent_data:
+                            raise DeliveryUnknown(str(e)) from e
+                        return False
+                    continue
+                self._idle.put(conn)
+                return True
+        return False
+
+    def send_many(self, emails: list[OutgoingEmail]) -> list[bool]:
+        return [self.send(e) for e in emails]
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.quit()
+            except Exception:
+                self._discard(conn)
+
+
+class ResendTransport:
+    """Resend HTTP API over one keep-alive session."""
+
+    def __init__(self, api_key, sender, base_url="https://api.resend.com",
+                 timeout=EMAIL_SEND_TIMEOUT, batch_size=RESEND_BATCH_SIZE):
+        self.sender = sender
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def _payload(self, email: OutgoingEmail) -> dict:
+        return {"from": self.sender, "to": [email.to], "subject": email.subject, "text": email.body}
+
+    def _post(self, path: str, json) -> bool:
+        try:
+            resp = self.session.post(f"{self.base_url}{path}", json=json, timeout=self.timeout)
+        except requests.ReadTimeout as e:
+            # the request went out; Resend may have accepted it
+            print(f"[mail] Resend timeout: {e}")
+            raise DeliveryUnknown(str(e)) from e
+        except Exception as e:
+            print(f"[mail] Resend exception: {e}")
+            return False
+        if 200 <= resp.status_code < 300:
+            return True
+        print(f"[mail] Resend error {resp.status_code}: {resp.text}")
+        return False
+
+    def send(self, email: OutgoingEmail) -> bool:
+        """POST one message; False if it was not sent, DeliveryUnknown on a read timeout."""
+        return self._post("/emails", self._payload(email))
+
+    def send_many(self, emails: list[OutgoingEmail]) -> list[bool | None]:
+        """Send through /emails/batch, `batch_size` messages per request.
+
+        The batch endpoint is all-or-nothing, so each chunk's result applies
+        to all of its messages: True, False, or None when the request timed
+        out waiting for the reply (delivery unknown).
+        """
+        single = len(emails) == 1
+        results = []
+        for i in range(0, len(emails), self.batch_size):
+            chunk = emails[i:i + self.batch_size]
+            try:
+                if single:
+                    ok = self.send(chunk[0])
+                else:
+                    ok = self._post("/emails/batch", [self._payload(e) for e in chunk])
+            except DeliveryUnknown:
+                ok = None
+            results.extend([ok] * len(chunk))
+        return results
+
+    def close(self) -> None:
+        self.session.close()
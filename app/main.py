@@ -1,32 +1,50 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, Header
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, date
+from typing import Annotated
 from contextlib import asynccontextmanager
 from fastapi.responses import RedirectResponse
 
-from .database import SessionLocal, engine
-from .models import Base, WeeklyMemory
+from . import database
+from .database import SessionLocal, DATABASE_ASYNC, async_engine
+from .models import WeeklyMemory
 from .schemas import WeeklyMemoryCreate, WeeklyMemoryOut
-from .schemas import GoalCreate, GoalOut, UnlinkedCreate, UnlinkedOut
+from .schemas import GoalCreate, GoalOut, GoalPage, UnlinkedCreate, UnlinkedOut, UnlinkedPage, SearchHit
+from .schemas import SessionCreate, SessionOut
 from . import time
-from .deps import get_author
+from . import calendar
+from . import crud
+from . import export
+from . import importer
+from . import pagination
+from . import migrations
+from . import search
+from . import admin_auth
+from . import outbox
+from . import versions
+from . import serialization
+from .cache import weeks_cache
+from .deps import get_author, require_admin
 try:
     from .scheduler import start as scheduler_start, stop as scheduler_stop
 except Exception:
     scheduler_start = None
     scheduler_stop = None
-from .tokens import consume_email_token, validate_email_token, generate_email_token
-from fastapi.responses import JSONResponse, RedirectResponse
-from .config import EXTERNAL_BASE_URL, AUTHORS, EMAIL_RECIPIENTS
-from .config import ADMIN_USER, ADMIN_PASSWORD_HASH
-from .emailer import send_email
+from .tokens import consume_email_token, validate_email_token, generate_email_tokens
+from .tokens import cache_stats as token_cache_stats
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
+from .config import EXTERNAL_BASE_URL, AUTHORS, EMAIL_RECIPIENTS, YEAR, WEEKS_MAX_RANGE, PAGE_MAX_LIMIT
+from .config import MIGRATE_ON_STARTUP, OUTBOX_WORKER_ENABLED
+from .emailer import close_transport
+from .mail_transport import OutgoingEmail
 from passlib.context import CryptContext
 import jwt
 from datetime import timedelta
 
 # Use the same SECRET as other HMAC tokens for signing admin JWTs
-from .auth import SECRET
+from .auth import SECRET, create_session_token
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
@@ -40,51 +58,32 @@ def create_admin_jwt(username: str):
 
 
 def verify_admin_jwt(token: str):
-    try:
-        data = jwt.decode(token, SECRET, algorithms=["HS256"])
-        sub = data.get("sub")
-        import os
-        admin_user = ADMIN_USER or os.environ.get("ADMIN_USER")
-        if sub and admin_user and sub == admin_user:
-            return True
-        return False
-    except Exception:
-        return False
-
-
-def _get_bearer_token(authorization: str | None) -> str:
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Missing Authorization header")
-    parts = authorization.split()
-    if len(parts) != 2 or parts[0].lower() != "bearer":
-        raise HTTPException(status_code=401, detail="Invalid Authorization header")
-    return parts[1]
-
+    return admin_auth.verify_token(token) is not None
 
 
-Base.metadata.create_all(bind=engine)
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # startup
-    try:
-        import os
-        admin_user_present = bool(os.environ.get("ADMIN_USER"))
-        admin_hash_present = bool(os.environ.get("ADMIN_PASSWORD_HASH"))
-        print(
-            f"[config] ADMIN_USER set={admin_user_present} ADMIN_PASSWORD_HASH set={admin_hash_present}"
-        )
-    except Exception:
-        pass
+    # startup: admin credentials are resolved once here
+    admin = admin_auth.load_settings()
+    print(f"[config] ADMIN_USER set={bool(admin.user)} ADMIN_PASSWORD_HASH set={bool(admin.password_hash)}")
+    if MIGRATE_ON_STARTUP:
+        migrations.upgrade()
     if scheduler_start:
         scheduler_start()
+    if OUTBOX_WORKER_ENABLED:
+        outbox.start()
     yield
     # shutdown
+    outbox.stop()
     if scheduler_stop:
         scheduler_stop()
+    admin_auth.shutdown()
+    close_transport()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=serialization.FastJSONResponse)
 
 # Allow frontend dev origins (React/Vite, etc.)
 app.add_middleware(
@@ -126,85 +125,111 @@ def create_weekly_memory(
     request: Request = None,
 ):
     # Allow tests to override current time via X-TEST-NOW header (ISO format)
-    current = time.now()
-    if request is not None:
-        test_now = request.headers.get("x-test-now")
-        if test_now:
-            try:
-                dt = datetime.fromisoformat(test_now)
-                # normalize to configured TZ
-                from . import time as _time
-
-                if dt.tzinfo is None:
-                    dt = dt.replace(tzinfo=_time.TZ)
-                else:
-                    dt = dt.astimezone(_time.TZ)
-                current = dt
-            except Exception:
-                # ignore parse errors and use real now()
-                pass
+    current = time.request_now(request)
 
     if not time.can_write(current):
         raise HTTPException(status_code=403, detail="Not writable now")
 
     monday = time.week_monday(current)
 
-    # Check if THIS AUTHOR already has a memory for this week
-    existing = db.query(WeeklyMemory).filter_by(week_monday=monday, author=author).first()
-    if existing:
-        # Update existing memory
-        existing.text = payload.text
-        existing.updated_at = current
-        db.commit()
-        db.refresh(existing)
-        return existing
-    
-    # Create new memory for this author
-    memory = WeeklyMemory(
-        week_monday=monday,
-        text=payload.text,
-        author=author,
-        created_at=current,
-        updated_at=current,
-    )
-
-    db.add(memory)
+    # One INSERT ... ON CONFLICT (week_monday, author) DO UPDATE ... RETURNING:
+    # concurrent submissions from the same author cannot race into the constraint
+    memory = crud.upsert_weekly_memory(db, monday, author, payload.text, current)
+    versions.bump(db, versions.WEEKS)
     db.commit()
-    db.refresh(memory)
+    weeks_cache.clear()
     return memory
 
 
 # NOTE: development-only token generation endpoint removed for security.
 
 @app.get("/weeks")
-def get_weeks(db: Session = Depends(get_db)):
-    weeks = time.all_2026_weeks()
-    all_memories = db.query(WeeklyMemory).all()
-    
-    # Group memories by week
-    memories_by_week = {}
-    for m in all_memories:
-        if m.week_monday not in memories_by_week:
-            memories_by_week[m.week_monday] = []
-        memories_by_week[m.week_monday].append(m)
+def get_weeks(
+    db: Session = Depends(get_db),
+    year: Annotated[int | None, Query(ge=1900, le=2100)] = None,
+    from_: Annotated[date | None, Query(alias="from")] = None,
+    to: date | None = None,
+    request: Request = None,
+):
+    # Either a whole ISO year or an explicit from/to window. The default year is
+    # the current ISO year (never before the first journal YEAR), so it follows
+    # is_active_week: entries written in a later year show up without a parameter.
+    if from_ is None and to is None:
+        weeks = time.all_weeks(year or max(YEAR, calendar.iso_year(time.request_now(request))))
+    else:
+        if year is not None:
+            raise HTTPException(status_code=400, detail="Use either year or from/to")
+        start = from_ or date(YEAR, 1, 1)
+        end = to or date(start.year, 12, 31)
+        if end < start:
+            raise HTTPException(status_code=400, detail="from must be before to")
+        weeks = time.weeks_between(
+            datetime(start.year, start.month, start.day, tzinfo=time.TZ),
+            datetime(end.year, end.month, end.day, tzinfo=time.TZ),
+        )
+        if len(weeks) > WEEKS_MAX_RANGE:
+            raise HTTPException(status_code=400, detail=f"Range too large (max {WEEKS_MAX_RANGE} weeks)")
+
+    version = versions.current(db, versions.WEEKS)
+    headers = {}
+    # Conditional GET: answer from the write-generation stamp alone when the
+    # client already holds the current payload for this URL.
+    if request is not None:
+        etag = versions.etag(versions.WEEKS, version)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if versions.etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+    # The window fully determines the payload; the version in the key makes
+    # entries built before any later commit (in any worker) unreachable.
+    key = (version, weeks[0], weeks[-1]) if weeks else (version, None, None)
+    body = weeks_cache.get(key)
+    if body is None:
+        body = serialization.dumps(_build_weeks(db, weeks))
+        weeks_cache.set(key, body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _build_weeks(db: Session, weeks: list[datetime]) -> list[dict]:
+    if not weeks:
+        return []
+
+    # Only the requested window, ordered like the (week_monday, author) index so
+    # the response can be built with a single merge pass over both lists.
+    rows = iter(
+        db.query(
+            WeeklyMemory.week_monday,
+            WeeklyMemory.author,
+            WeeklyMemory.text,
+            WeeklyMemory.created_at,
+            WeeklyMemory.updated_at,
+        )
+        .filter(WeeklyMemory.week_monday >= weeks[0], WeeklyMemory.week_monday <= weeks[-1])
+        .order_by(WeeklyMemory.week_monday, WeeklyMemory.author)
+    )
+    row = next(rows, None)
+    row_monday = time.localize(row.week_monday) if row is not None else None
 
     result = []
     for w in weeks:
-        if w in memories_by_week:
-            # Multiple authors may have written for this week
-            week_memories = memories_by_week[w]
+        week_memories = []
+        # Multiple authors may have written for this week
+        while row is not None and row_monday <= w:
+            if row_monday == w:
+                week_memories.append({
+                    "author": row.author,
+                    "text": row.text,
+                    "created_at": row.created_at.isoformat(),
+                    "updated_at": row.updated_at.isoformat(),
+                })
+            row = next(rows, None)
+            row_monday = time.localize(row.week_monday) if row is not None else None
+
+        if week_memories:
             result.append({
                 "week_monday": w.isoformat(),
                 "status": "written",
-                "memories": [
-                    {
-                        "author": m.author,
-                        "text": m.text,
-                        "created_at": m.created_at.isoformat(),
-                        "updated_at": m.updated_at.isoformat(),
-                    }
-                    for m in week_memories
-                ],
+                "memories": week_memories,
             })
         else:
             result.append({
@@ -214,7 +239,6 @@ def get_weeks(db: Session = Depends(get_db)):
     return result
 
 
-
 @app.get("/token/{token}")
 def consume_token(token: str, request: Request):
     # Validate without consuming: this endpoint is used by the frontend to check token validity
@@ -234,6 +258,17 @@ def consume_token(token: str, request: Request):
     return {"author": author, "ok": True}
 
 
+@app.post("/session", response_model=SessionOut)
+def create_session(payload: SessionCreate):
+    # Spend the emailed token once; later requests carry the signed session
+    # token, which get_author checks without touching the database
+    author = consume_email_token(payload.token)
+    if not author or author not in AUTHORS:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    token, expires_at = create_session_token(author)
+    return {"session_token": token, "author": author, "expires_at": expires_at}
+
+
 from pydantic import BaseModel
 
 
@@ -243,16 +278,17 @@ class AdminLogin(BaseModel):
 
 
 @app.post("/admin/login")
-def admin_login(payload: AdminLogin):
-    # Read admin config from environment at request time to handle reloads
-    import os
-    admin_user = ADMIN_USER or os.environ.get("ADMIN_USER")
-    admin_hash = ADMIN_PASSWORD_HASH or os.environ.get("ADMIN_PASSWORD_HASH")
-    if isinstance(admin_hash, str):
-        admin_hash = admin_hash.strip()
+async def admin_login(payload: AdminLogin, request: Request):
+    admin = admin_auth.settings()
+    admin_user, admin_hash = admin.user, admin.password_hash
     if not admin_user or not admin_hash:
         raise HTTPException(status_code=503, detail="Admin not configured")
 
+    # throttle before any hashing, wrong usernames included
+    client_ip = request.client.host if request.client else None
+    if not admin_auth.allow_attempt(client_ip, payload.username):
+        raise HTTPException(status_code=429, detail="Too many login attempts", headers={"Retry-After": "60"})
+
     if payload.username != admin_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
@@ -265,60 +301,90 @@ def admin_login(payload: AdminLogin):
 
     # verify password
     try:
-        if not pwd_context.verify(payload.password, admin_hash):
-            raise HTTPException(status_code=401, detail="Invalid credentials")
+        verified = await admin_auth.verify_password(payload.password, admin_hash)
+    except admin_auth.Busy:
+        raise HTTPException(status_code=429, detail="Too many login attempts", headers={"Retry-After": "1"})
     except Exception as exc:
-        # Surface the backend error to help debug env/config mismatches in Railway
-        raise HTTPException(status_code=500, detail=f"Admin verify error: {exc}")
+        # details go to the server log only, never to the caller
+        print(f"[admin] password verification failed: {exc!r}")
+        raise HTTPException(status_code=500, detail="Admin verify error")
+    if not verified:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
     token = create_admin_jwt(payload.username)
     return {"ok": True, "token": token}
 
 
-@app.get("/admin/env-check")
-def admin_env_check(authorization: str | None = Header(default=None)):
-    token = _get_bearer_token(authorization)
-    if not verify_admin_jwt(token):
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    import os
-    admin_user = ADMIN_USER or os.environ.get("ADMIN_USER")
-    admin_hash = ADMIN_PASSWORD_HASH or os.environ.get("ADMIN_PASSWORD_HASH")
+@app.get("/admin/env-check", dependencies=[Depends(require_admin)])
+def admin_env_check():
+    admin = admin_auth.settings()
     return {
-        "admin_user_set": bool(admin_user),
-        "admin_hash_set": bool(admin_hash),
+        "admin_user_set": bool(admin.user),
+        "admin_hash_set": bool(admin.password_hash),
     }
 
 
-@app.get("/admin/ping")
-def admin_ping(authorization: str | None = Header(default=None)):
-    token = _get_bearer_token(authorization)
-    # ensure admin user is read dynamically as well
-    import os
-    admin_user = ADMIN_USER or os.environ.get("ADMIN_USER")
-    if not admin_user:
-        raise HTTPException(status_code=503, detail="Admin not configured")
-    if not verify_admin_jwt(token):
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+@app.get("/admin/ping", dependencies=[Depends(require_admin)])
+def admin_ping():
     return {"ok": True}
 
 
-@app.post("/admin/send-test-emails")
-def admin_send_test_emails(authorization: str | None = Header(default=None)):
-    token = _get_bearer_token(authorization)
-    if not verify_admin_jwt(token):
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+@app.get("/admin/stats", dependencies=[Depends(require_admin)])
+def admin_stats():
+    return {
+        "weeks_cache": weeks_cache.stats(),
+        "db_pool": database.pool_stats(),
+        "token_cache": token_cache_stats(),
+        "admin_login": admin_auth.stats(),
+        "email_outbox": outbox.stats(),
+    }
+
+
+@app.get("/admin/export", dependencies=[Depends(require_admin)])
+def admin_export(
+    format: Annotated[str, Query(pattern="^(ndjson|csv)$")] = "ndjson",
+    gzip: bool = False,
+):
+    if gzip:
+        media_type = "application/gzip"
+    else:
+        media_type = "application/x-ndjson" if format == "ndjson" else "text/csv; charset=utf-8"
+    name = export.filename(format, gzip, time.now())
+    return StreamingResponse(
+        export.stream(format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}"'},
+    )
+
 
+@app.post("/admin/import", dependencies=[Depends(require_admin)])
+async def admin_import(
+    request: Request,
+    batch_size: Annotated[int, Query(ge=1, le=importer.MAX_BATCH_SIZE)] = importer.DEFAULT_BATCH_SIZE,
+):
+    # NDJSON body, same shape as /admin/export; the DB work runs off the event loop
+    body = await request.body()
+    return await run_in_threadpool(importer.import_lines, body.splitlines(), batch_size)
+
+
+@app.post("/admin/send-test-emails", dependencies=[Depends(require_admin)])
+def admin_send_test_emails():
     base_url = (EXTERNAL_BASE_URL or "").rstrip("/")
     if not base_url:
         raise HTTPException(status_code=400, detail="EXTERNAL_BASE_URL not configured")
 
+    recipients = [a for a in AUTHORS if EMAIL_RECIPIENTS.get(a)]
+    # one insert + commit for every recipient's token
+    minted = dict(zip(recipients, generate_email_tokens(recipients)))
+
     results = []
+    outgoing = []
     for author in AUTHORS:
         to_email = EMAIL_RECIPIENTS.get(author)
         if not to_email:
             results.append({"author": author, "ok": False, "error": "missing recipient"})
             continue
-        author_token = generate_email_token(author)
+        author_token = minted[author]
         link = f"{base_url}/token/{author_token}"
         subject = "Tu token de acceso - Memories"
         body = (
@@ -327,17 +393,49 @@ def admin_send_test_emails(authorization: str | None = Header(default=None)):
             f"Token (por si lo necesitas):\n{author_token}\n\n"
             "Saludos,\nSistema de Memories"
         )
-        ok = send_email(subject, body, to_email)
-        results.append({"author": author, "ok": ok, "to": to_email, "link": link})
+        outgoing.append((f"test:{author_token}", OutgoingEmail(subject, body, to_email)))
+        # "ok" now means queued: the outbox worker sends and retries
+        results.append({"author": author, "ok": True, "to": to_email, "link": link})
+
+    outbox.enqueue(outgoing)
 
     return {"ok": True, "results": results}
 
 
+@app.get("/search", response_model=list[SearchHit])
+def search_entries(
+    q: Annotated[str, Query(min_length=1, max_length=200)],
+    db: Session = Depends(get_db),
+    author: str = Depends(get_author),
+    limit: Annotated[int, Query(ge=1, le=PAGE_MAX_LIMIT)] = 20,
+):
+    try:
+        return search.search(db, author, q, limit)
+    except search.UnsupportedBackend as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+
 # Goals endpoints
-@app.get("/goals", response_model=list[GoalOut])
-def list_goals(db: Session = Depends(get_db), author: str = Depends(get_author)):
+@app.get("/goals", response_model=list[GoalOut] | GoalPage)
+def list_goals(
+    db: Session = Depends(get_db),
+    author: str = Depends(get_author),
+    limit: Annotated[int | None, Query(ge=1, le=PAGE_MAX_LIMIT)] = None,
+    cursor: str | None = None,
+):
     from .models import Goal
-    items = db.query(Goal).filter_by(author=author).order_by(Goal.created_at.desc()).all()
+    page = pagination.requested(limit, cursor)
+    if page is not None:
+        limit, after = page
+        fields = tuple(GoalOut.model_fields)
+        rows = db.execute(crud.author_rows_stmt(Goal, fields, author, after, limit + 1)).all()
+        return pagination.page_response(rows, fields, limit)
+    if serialization.FAST_JSON:
+        # Column-only rows shaped like GoalOut, encoded without per-row validation
+        fields = tuple(GoalOut.model_fields)
+        rows = db.execute(crud.author_rows_stmt(Goal, fields, author))
+        return serialization.rows_response(rows, fields)
+    items = db.query(Goal).filter_by(author=author).order_by(Goal.created_at.desc(), Goal.id.desc()).all()
     return items
 
 
@@ -364,10 +462,30 @@ def delete_goal(id: int, db: Session = Depends(get_db), author: str = Depends(ge
 
 
 # Unlinked memories endpoints
-@app.get("/unlinked", response_model=list[UnlinkedOut])
-def list_unlinked(db: Session = Depends(get_db), author: str = Depends(get_author)):
+@app.get("/unlinked", response_model=list[UnlinkedOut] | UnlinkedPage)
+def list_unlinked(
+    db: Session = Depends(get_db),
+    author: str = Depends(get_author),
+    limit: Annotated[int | None, Query(ge=1, le=PAGE_MAX_LIMIT)] = None,
+    cursor: str | None = None,
+):
     from .models import UnlinkedMemory
-    items = db.query(UnlinkedMemory).filter_by(author=author).order_by(UnlinkedMemory.created_at.desc()).all()
+    page = pagination.requested(limit, cursor)
+    if page is not None:
+        limit, after = page
+        fields = tuple(UnlinkedOut.model_fields)
+        rows = db.execute(crud.author_rows_stmt(UnlinkedMemory, fields, author, after, limit + 1)).all()
+        return pagination.page_response(rows, fields, limit)
+    if serialization.FAST_JSON:
+        fields = tuple(UnlinkedOut.model_fields)
+        rows = db.execute(crud.author_rows_stmt(UnlinkedMemory, fields, author))
+        return serialization.rows_response(rows, fields)
+    items = (
+        db.query(UnlinkedMemory)
+        .filter_by(author=author)
+        .order_by(UnlinkedMemory.created_at.desc(), UnlinkedMemory.id.desc())
+        .all()
+    )
     return items
 
 
@@ -391,3 +509,16 @@ def delete_unlinked(id: int, db: Session = Depends(get_db), author: str = Depend
     db.delete(u)
     db.commit()
     return {"ok": True}
+
+
+# With DATABASE_ASYNC=1 the async CRUD endpoints replace the sync ones above
+if DATABASE_ASYNC:
+    from fastapi.routing import APIRoute
+    from .async_api import router as async_router
+
+    _async_routes = {(r.path, m) for r in async_router.routes for m in r.methods}
+    app.router.routes = [
+        r for r in app.router.routes
+        if not (isinstance(r, APIRoute) and any((r.path, m) in _async_routes for m in r.methods))
+    ]
+    app.include_router(async_router)
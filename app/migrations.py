@@ -0,0 +1,148 @@
+"""Versioned schema migrations.
+
+Each step runs once, in order, inside its own transaction; the highest
+applied version is recorded in the `schema_version` table. Steps must be
+idempotent (CREATE ... IF NOT EXISTS / checkfirst) so two workers booting at
+the same time cannot break each other.
+
+Run from the app's startup hook (MIGRATE_ON_STARTUP, default on) or once per
+deploy with:
+
+  python -m app.migrations
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+from . import database
+from .models import Base, DatasetVersion, EmailOutbox, EmailToken, Goal, SchedulerLease, UnlinkedMemory, WeeklyMemory
+
+_meta = MetaData()
+schema_version = Table(
+    "schema_version",
+    _meta,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def _baseline(conn):
+    # Tables that existed before migrations; on old databases these are no-ops
+    Base.metadata.create_all(
+        conn,
+        tables=[
+            WeeklyMemory.__table__,
+            EmailToken.__table__,
+            Goal.__table__,
+            UnlinkedMemory.__table__,
+            DatasetVersion.__table__,
+        ],
+    )
+
+
+def _hot_query_indexes(conn):
+    for ddl in (
+        "CREATE INDEX IF NOT EXISTS ix_weekly_memories_week_monday ON weekly_memories (week_monday)",
+        "CREATE INDEX IF NOT EXISTS ix_goals_author_created_at ON goals (author, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_unlinked_memories_author_created_at ON unlinked_memories (author, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_email_tokens_expires_at ON email_tokens (expires_at)",
+    ):
+        conn.execute(text(ddl))
+
+
+def _keyset_indexes(conn):
+    # (author, created_at, id) serves both the full listing and keyset pages;
+    # the (author, created_at) index from step 2 is a redundant prefix of it
+    for table in ("goals", "unlinked_memories"):
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_author_created_at_id ON {table} (author, created_at, id)"
+        ))
+        conn.execute(text(f"DROP INDEX IF EXISTS ix_{table}_author_created_at"))
+
+
+def _full_text_search(conn):
+    # SQLite: FTS5 table + sync triggers (and backfill); Postgres: tsvector + GIN
+    from . import search
+
+    if conn.dialect.name == "sqlite":
+        ddl = search.sqlite_ddl()
+    elif conn.dialect.name == "postgresql":
+        ddl = search.postgres_ddl()
+    else:
+        ddl = []
+    for stmt in ddl:
+        conn.execute(text(stmt))
+
+
+def _email_outbox(conn):
+    EmailOutbox.__table__.create(conn, checkfirst=True)
+
+
+def _scheduler_leases(conn):
+    SchedulerLease.__table__.create(conn, checkfirst=True)
+
+
+def _accent_insensitive_search(conn):
+    # Postgres columns from step 4 used plain 'spanish', which keeps accents;
+    # SQLite's FTS5 index already strips them
+    from . import search
+
+    if conn.dialect.name == "postgresql":
+        for stmt in search.postgres_rebuild_ddl():
+            conn.execute(text(stmt))
+
+
+# (version, description, step) — append only, never renumber
+MIGRATIONS = [
+    (1, "baseline tables", _baseline),
+    (2, "indexes for /weeks, author listings and token expiry", _hot_query_indexes),
+    (3, "(author, created_at, id) indexes for keyset pagination", _keyset_indexes),
+    (4, "full-text search index over memories and goals", _full_text_search),
+    (5, "email outbox", _email_outbox),
+    (6, "scheduler leader lease", _scheduler_leases),
+    (7, "accent-insensitive full-text search on Postgres", _accent_insensitive_search),
+]
+
+
+def current_version(conn) -> int:
+    latest = select(schema_version.c.version).order_by(schema_version.c.version.desc()).limit(1)
+    return conn.execute(latest).scalar() or 0
+
+
+def upgrade(engine=None) -> list[int]:
+    """Apply pending migrations. Returns the versions applied by this call."""
+    engine = engine or database.engine
+    # common case on boot: already current, so skip create_all and the per-step locks
+    with engine.connect() as conn:
+        if inspect(conn).has_table(schema_version.name) and current_version(conn) >= MIGRATIONS[-1][0]:
+            return []
+    _meta.create_all(engine)
+
+    applied = []
+    for version, description, step in MIGRATIONS:
+        try:
+            with engine.begin() as conn:
+                if engine.dialect.name == "postgresql":
+                    # serialize concurrent boots; released at commit
+                    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": 0x6D656D73})
+                if current_version(conn) >= version:
+                    continue
+                step(conn)
+                conn.execute(
+                    schema_version.insert().values(
+                        version=version, description=description, applied_at=datetime.now(timezone.utc)
+                    )
+                )
+        except IntegrityError:
+            # another process recorded this version first
+            continue
+        applied.append(version)
+        print(f"[migrations] applied {version}: {description}")
+    return applied
+
+
+if __name__ == "__main__":
+    done = upgrade()
+    print(f"[migrations] schema at version {MIGRATIONS[-1][0]} ({len(done)} applied)")
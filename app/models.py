@@ -1,11 +1,11 @@
-from sqlalchemy import Column, Integer, DateTime, Text, String, UniqueConstraint
+from sqlalchemy import Column, Integer, DateTime, Text, String, UniqueConstraint, Index
 from .database import Base
 
 class WeeklyMemory(Base):
     __tablename__ = "weekly_memories"
 
     id = Column(Integer, primary_key=True)
-    week_monday = Column(DateTime(timezone=True), nullable=False)
+    week_monday = Column(DateTime(timezone=True), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), nullable=False)    
     text = Column(Text, nullable=False)
     author = Column(String, nullable=False)
@@ -22,7 +22,7 @@ class EmailToken(Base):
     id = Column(Integer, primary_key=True)
     token = Column(String, nullable=False, unique=True)
     author = Column(String, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
     used = Column(Integer, nullable=False, default=0)
 
 
@@ -34,6 +34,10 @@ class Goal(Base):
     author = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False)
 
+    __table_args__ = (
+        Index("ix_goals_author_created_at_id", "author", "created_at", "id"),
+    )
+
 
 class UnlinkedMemory(Base):
     __tablename__ = "unlinked_memories"
@@ -42,3 +46,53 @@ class UnlinkedMemory(Base):
     text = Column(Text, nullable=False)
     author = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_unlinked_memories_author_created_at_id", "author", "created_at", "id"),
+    )
+
+
+
+class DatasetVersion(Base):
+    """Write-generation counter per dataset, bumped in the same transaction as the write."""
+
+    __tablename__ = "dataset_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class EmailOutbox(Base):
+    """Outgoing email waiting to be sent (or kept as a record once sent/failed)."""
+
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    # same key enqueued twice (e.g. a reminder job firing twice) is stored once
+    dedupe_key = Column(String, nullable=False, unique=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    # pending -> sending -> sent, or back to pending with a later next_attempt_at,
+    # or failed once max attempts are used up
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
+class SchedulerLease(Base):
+    """Named lease held by one process at a time until `expires_at` (see `leases`)."""
+
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,227 @@
+"""Durable email outbox.
+
+Callers `enqueue()` messages into the `email_outbox` table and return at once;
+a background thread started from the app's lifespan drains it. Each row is
+claimed with a conditional UPDATE (pending -> sending) so two workers never
+send the same message, failed sends are retried with exponential backoff up to
+OUTBOX_MAX_ATTEMPTS, and a row left in "sending" by a crashed worker is
+reclaimed after OUTBOX_CLAIM_TIMEOUT_SECONDS. A send whose outcome is unknown
+(it timed out after the message was handed over) is also left in "sending":
+only that stale-claim reclaim retries it, never the next drain. Every claim
+counts as an attempt, so OUTBOX_MAX_ATTEMPTS caps those retries too.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, func, or_, select, update
+
+from . import database
+from . import emailer
+from .config import OUTBOX_BACKOFF_MAX_SECONDS, OUTBOX_BACKOFF_SECONDS, OUTBOX_BATCH_SIZE
+from .config import OUTBOX_CLAIM_TIMEOUT_SECONDS, OUTBOX_MAX_ATTEMPTS, OUTBOX_POLL_SECONDS
+from .crud import dialect_insert
+from .mail_transport import OutgoingEmail
+from .models import EmailOutbox
+
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    # SQLite hands back naive datetimes; everything in this table is stored in UTC
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before retry number `attempts` + 1."""
+    return timedelta(seconds=min(OUTBOX_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), OUTBOX_BACKOFF_MAX_SECONDS))
+
+
+def enqueue(items: list[tuple[str, OutgoingEmail]]) -> int:
+    """Queue (dedupe_key, email) pairs in one batched insert; keys already queued are skipped.
+
+    Returns the number of new rows (as reported by the driver's rowcount).
+    """
+    if not items:
+        return 0
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "dedupe_key": key,
+            "recipient": email.to,
+            "subject": email.subject,
+            "body": email.body,
+            "status": PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+        }
+        for key, email in items
+    ]
+    db = database.SessionLocal()
+    try:
+        stmt = dialect_insert(db, EmailOutbox.__table__).on_conflict_do_nothing(index_elements=["dedupe_key"])
+        inserted = db.execute(stmt, rows).rowcount
+        db.commit()
+    finally:
+        db.close()
+    wake()
+    return inserted
+
+
+def _stale(now: datetime):
+    return and_(
+        EmailOutbox.status == SENDING,
+        EmailOutbox.claimed_at < now - timedelta(seconds=OUTBOX_CLAIM_TIMEOUT_SECONDS),
+    )
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(EmailOutbox.status == PENDING, EmailOutbox.next_attempt_at <= now),
+        # a stale claim is only retried while attempts remain
+        and_(_stale(now), EmailOutbox.attempts < OUTBOX_MAX_ATTEMPTS),
+    )
+
+
+def claim(db, limit: int, now: datetime) -> list[EmailOutbox]:
+    """Mark up to `limit` due rows as sending; rows another worker got first are skipped.
+
+    Stale claims that already used every attempt are marked failed instead.
+    """
+    given_up = db.execute(
+        update(EmailOutbox)
+        .where(_stale(now), EmailOutbox.attempts >= OUTBOX_MAX_ATTEMPTS)
+        .values(status=FAILED)
+    ).rowcount
+    if given_up:
+        print(f"[outbox] giving up on {given_up} stale claims after {OUTBOX_MAX_ATTEMPTS} attempts")
+    candidates = db.execute(
+        select(EmailOutbox.id).where(_claimable(now)).order_by(EmailOutbox.next_attempt_at).limit(limit)
+    ).scalars().all()
+    claimed = []
+    for row_id in candidates:
+        result = db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == row_id, _claimable(now))
+            .values(status=SENDING, claimed_at=now, attempts=EmailOutbox.attempts + 1)
+        )
+        if result.rowcount == 1:
+            claimed.append(row_id)
+    db.commit()
+    if not claimed:
+        return []
+    return db.execute(select(EmailOutbox).where(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id)).scalars().all()
+
+
+def drain_once(batch_size: int = OUTBOX_BATCH_SIZE) -> dict:
+    """Claim and send one batch concurrently.
+
+    Returns counts of sent / retried / failed / unknown rows and the
+    per-recipient results (with timings) under "results".
+    """
+    counts = {"sent": 0, "retried": 0, "failed": 0, "unknown": 0, "results": []}
+    db = database.SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        rows = claim(db, batch_size, now)
+        if not rows:
+            return counts
+        results = emailer.deliver([OutgoingEmail(r.subject, r.body, r.recipient) for r in rows])
+        done = datetime.now(timezone.utc)
+        for row, result in zip(rows, results):
+            counts["results"].append(result.as_dict())
+            if result.ok:
+                row.status, row.sent_at, row.last_error = SENT, done, None
+                counts["sent"] += 1
+            elif row.attempts >= OUTBOX_MAX_ATTEMPTS:
+                row.status, row.last_error = FAILED, result.error
+                counts["failed"] += 1
+                print(f"[outbox] giving up on {row.dedupe_key} after {row.attempts} attempts: {result.error}")
+            elif result.unknown:
+                # may have been delivered: stays "sending" until the claim goes stale
+                row.last_error = result.error
+                counts["unknown"] += 1
+                print(f"[outbox] outcome unknown for {row.dedupe_key}, leaving it claimed")
+            else:
+                row.status, row.last_error = PENDING, result.error
+                row.next_attempt_at = done + backoff(row.attempts)
+                counts["retried"] += 1
+        db.commit()
+        return counts
+    finally:
+        db.close()
+
+
+def stats() -> dict:
+    """Queue depth per unsent status and the age of the oldest pending message."""
+    db = database.SessionLocal()
+    try:
+        by_status = dict(
+            db.execute(
+                select(EmailOutbox.status, func.count())
+                .where(EmailOutbox.status != SENT)
+                .group_by(EmailOutbox.status)
+            ).all()
+        )
+        oldest = _utc(db.execute(select(func.min(EmailOutbox.created_at)).where(EmailOutbox.status == PENDING)).scalar())
+    finally:
+        db.close()
+    age = (datetime.now(timezone.utc) - oldest).total_seconds() if oldest else 0.0
+    return {
+        "pending": by_status.get(PENDING, 0),
+        "sending": by_status.get(SENDING, 0),
+        "failed": by_status.get(FAILED, 0),
+        "oldest_pending_age_seconds": round(age, 1),
+    }
+
+
+# Background worker
+
+_wake = threading.Event()
+_stop = threading.Event()
+_thread = None
+
+
+def wake() -> None:
+    """Ask the worker to drain now instead of at its next poll."""
+    _wake.set()
+
+
+def _run():
+    while not _stop.is_set():
+        try:
+            counts = drain_once()
+        except Exception as e:
+            print(f"[outbox] drain failed: {e}")
+            counts = None
+        if counts and counts["results"]:
+            slowest = max(r["elapsed_ms"] for r in counts["results"])
+            print(
+                f"[outbox] sent={counts['sent']} retried={counts['retried']} "
+                f"failed={counts['failed']} unknown={counts['unknown']} slowest={slowest}ms"
+            )
+            # a full batch may mean more is due: go again without waiting
+            if len(counts["results"]) >= OUTBOX_BATCH_SIZE:
+                continue
+        _wake.wait(OUTBOX_POLL_SECONDS)
+        _wake.clear()
+
+
+def start():
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="email-outbox", daemon=True)
+    _thread.start()
+
+
+def stop(timeout: float = 5.0):
+    global _thread
+    _stop.set()
+    _wake.set()
+    if _thread is not None:
+        _thread.join(timeout)
+        _thread = None
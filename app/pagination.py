@@ -0,0 +1,53 @@
+"""Keyset (cursor) pagination for the per-author listings, newest first.
+
+A page is the index range scan `(author, created_at, id) < cursor` on the
+(author, created_at, id) index, so its cost does not depend on how many
+pages came before. Cursors are opaque to clients.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from . import serialization
+from .config import LEGACY_UNPAGINATED_LISTS, PAGE_DEFAULT_LIMIT
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    return datetime.fromisoformat(created_at), int(id)
+
+
+def requested(limit: int | None, cursor: str | None):
+    """(limit, after) for a paginated request, or None for the legacy full list."""
+    if limit is None and cursor is None and LEGACY_UNPAGINATED_LISTS:
+        return None
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    return (limit or PAGE_DEFAULT_LIMIT), after
+
+
+def page_response(rows: Sequence, fields: Sequence[str], limit: int) -> Response:
+    """Encode up to `limit` rows (fetched as limit + 1) with the next cursor, if any."""
+    items = [dict(zip(fields, row)) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+    return Response(
+        content=serialization.dumps({"items": items, "next_cursor": next_cursor}),
+        media_type="application/json",
+    )
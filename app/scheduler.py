@@ -1,77 +1,166 @@
 try:
     from apscheduler.schedulers.background import BackgroundScheduler
     from apscheduler.triggers.cron import CronTrigger
+    from apscheduler.triggers.interval import IntervalTrigger
     from zoneinfo import ZoneInfo
     APSCHEDULER_AVAILABLE = True
 except Exception:
     APSCHEDULER_AVAILABLE = False
 
+import functools
+import time as _time
 from datetime import datetime
-from .config import TZ_KEY, REMINDER_HOUR, EMAIL_RECIPIENTS
+from sqlalchemy import select
+from .config import TZ_KEY, REMINDER_HOUR, EMAIL_RECIPIENTS, TOKEN_PURGE_INTERVAL_MINUTES
+from .config import SCHEDULER_LEASE_TTL_SECONDS
+from .leases import LeaderLease
 from .time import now, week_monday
-from .database import SessionLocal
+from . import database
 from .models import WeeklyMemory
-from .emailer import send_email
+from . import outbox
+from .mail_transport import OutgoingEmail
 from .config import AUTHORS, EXTERNAL_BASE_URL
-from .tokens import generate_email_token
+from .tokens import generate_email_tokens, purge_email_tokens
+
+
+# Jobs are plain functions so they can run (and be tested) without APScheduler
+
+
+def _authors_who_wrote(db, monday: datetime) -> set[str]:
+    # one indexed lookup on week_monday, however many authors there are
+    rows = db.execute(select(WeeklyMemory.author).where(WeeklyMemory.week_monday == monday).distinct())
+    return set(rows.scalars())
+
+
+def _send_weekly_reminders():
+    """Check the current week and send reminders to authors who haven't written yet.
+
+    Authors whose entry for the week already exists, or with no address in
+    EMAIL_RECIPIENTS, are skipped; the rest get a token and a queued email.
+    """
+    current = now()
+    # Only act on Sundays — the scheduler trigger should ensure this,
+    # but keep a guard.
+    if current.weekday() != 6:
+        return
+
+    monday = week_monday(current)
+    db = database.SessionLocal()
+    try:
+        wrote = _authors_who_wrote(db, monday)
+    finally:
+        db.close()
+
+    recipients = [a for a in AUTHORS if a not in wrote and EMAIL_RECIPIENTS.get(a)]
+    if not recipients:
+        return
+    # Single-use tokens for every recipient, minted in one transaction
+    minted = generate_email_tokens(recipients)
+
+    outgoing = []
+    for author, token in zip(recipients, minted):
+        to = EMAIL_RECIPIENTS[author]
+        link = None
+        if EXTERNAL_BASE_URL:
+            link = f"{EXTERNAL_BASE_URL.rstrip('/')}/token/{token}"
+        else:
+            # If no external URL configured, include token so frontend can build link
+            link = f"TOKEN:{token}"
+
+        subject = f"Recordatorio: escribir el recuerdo semanal ({monday.date().isoformat()})"
+        body = (
+            f"Hola {author},\n\nEs hora de escribir vuestro recuerdo semanal para la semana que empieza el {monday.date().isoformat()}.\n"
+            f"Usa el siguiente enlace para acceder y escribir: {link}\n\nUn saludo."
+        )
+        # keyed by week: a second firing for the same week is a no-op
+        outgoing.append((f"reminder:{monday.date().isoformat()}:{author}", OutgoingEmail(subject, body, to)))
+    outbox.enqueue(outgoing)
+
+
+def _purge_email_tokens():
+    """Delete expired/used email tokens so the table and its indexes stay small."""
+    try:
+        purged = purge_email_tokens()
+    except Exception as e:
+        print(f"[scheduler] token purge failed: {e}")
+        return
+    print(f"[scheduler] purged {purged} email tokens")
+    return purged
+
+
+def leader_only(job, lease: LeaderLease, wait: float | None = None):
+    """Wrap `job` so it only runs in the process holding `lease`.
+
+    The lease is renewed (or taken over, if the old leader is gone) right
+    before each firing, so exactly one replica does the work. A replica that
+    is not the leader keeps trying for up to `wait` seconds (default: one
+    lease TTL): if the leader died just before the firing, its lease lapses
+    within that window and this replica runs the job instead of every
+    replica skipping it.
+    """
+    wait = lease.ttl if wait is None else wait
+
+    @functools.wraps(job)
+    def run():
+        deadline = _time.monotonic() + wait
+        while not lease.acquire_or_renew():
+            remaining = deadline - _time.monotonic()
+            if remaining <= 0:
+                return None
+            _time.sleep(min(max(lease.ttl / 10, 0.05), remaining))
+        return job()
+
+    return run
+
+
+lease = None
 
 
 if APSCHEDULER_AVAILABLE:
     scheduler = BackgroundScheduler(timezone=ZoneInfo(TZ_KEY))
 
 
-    def _send_weekly_reminders():
-        """Check the current week and send reminders to authors who haven't written yet.
-
-        This job will iterate authors and if the week's entry is missing, send an email
-        to that author address (if present in EMAIL_RECIPIENTS).
-        """
-        db = SessionLocal()
-        try:
-            current = now()
-            # Only act on Sundays — the scheduler trigger should ensure this,
-            # but keep a guard.
-            if current.weekday() != 6:
-                return
-
-            monday = week_monday(current)
-
-            for author in AUTHORS:
-                # If recipient not configured, skip
-                to = EMAIL_RECIPIENTS.get(author)
-                if not to:
-                    continue
-
-                # Generate a single-use token and include link in email
-                token = generate_email_token(author)
-                link = None
-                if EXTERNAL_BASE_URL:
-                    link = f"{EXTERNAL_BASE_URL.rstrip('/')}/token/{token}"
-                else:
-                    # If no external URL configured, include token so frontend can build link
-                    link = f"TOKEN:{token}"
-
-                subject = f"Recordatorio: escribir el recuerdo semanal ({monday.date().isoformat()})"
-                body = (
-                    f"Hola {author},\n\nEs hora de escribir vuestro recuerdo semanal para la semana que empieza el {monday.date().isoformat()}.\n"
-                    f"Usa el siguiente enlace para acceder y escribir: {link}\n\nUn saludo."
-                )
-                send_email(subject, body, to)
-        finally:
-            db.close()
+    def _renew_lease():
+        was_leader = lease.is_leader
+        if lease.acquire_or_renew() != was_leader:
+            print(f"[scheduler] {'became' if lease.is_leader else 'lost'} leader ({lease.holder})")
 
 
     def start():
+        global lease
+        lease = LeaderLease("scheduler")
+        _renew_lease()
+        # renew well inside the TTL so a live leader never lapses
+        scheduler.add_job(
+            _renew_lease,
+            IntervalTrigger(seconds=max(SCHEDULER_LEASE_TTL_SECONDS / 3, 1)),
+            id="leader_lease",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
         # Cron: every Sunday at REMINDER_HOUR (in TZ)
         trigger = CronTrigger(day_of_week="sun", hour=REMINDER_HOUR, minute=0)
         scheduler.add_job(
-            _send_weekly_reminders, trigger, id="weekly_reminder", replace_existing=True
+            leader_only(_send_weekly_reminders, lease), trigger, id="weekly_reminder", replace_existing=True
         )
+        if TOKEN_PURGE_INTERVAL_MINUTES > 0:
+            scheduler.add_job(
+                leader_only(_purge_email_tokens, lease),
+                IntervalTrigger(minutes=TOKEN_PURGE_INTERVAL_MINUTES),
+                id="purge_email_tokens",
+                replace_existing=True,
+                # one run at a time; a missed run is simply picked up by the next
+                max_instances=1,
+                coalesce=True,
+            )
         scheduler.start()
 
 
     def stop():
         scheduler.shutdown(wait=False)
+        if lease is not None:
+            lease.release()
 
 else:
     # APScheduler not available in this environment (tests/dev).
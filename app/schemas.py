@@ -28,6 +28,11 @@ class GoalOut(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class GoalPage(BaseModel):
+    items: list[GoalOut]
+    next_cursor: str | None
+
+
 class UnlinkedCreate(BaseModel):
     text: str
 
@@ -38,3 +43,28 @@ class UnlinkedOut(BaseModel):
     author: str
     created_at: datetime
     model_config = {"from_attributes": True}
+
+
+class UnlinkedPage(BaseModel):
+    items: list[UnlinkedOut]
+    next_cursor: str | None
+
+
+class SearchHit(BaseModel):
+    kind: str
+    id: int
+    date: datetime
+    # HTML-escaped text with the matched terms wrapped in <mark>
+    snippet: str
+    score: float
+
+
+class SessionCreate(BaseModel):
+    # single-use token from the reminder email
+    token: str
+
+
+class SessionOut(BaseModel):
+    session_token: str
+    author: str
+    expires_at: datetime
@@ -0,0 +1,156 @@
+"""Full-text search over weekly memories, goals and unlinked memories.
+
+SQLite: one FTS5 table (`search_fts`) kept in sync by triggers on the three
+source tables; rowid = id * 4 + kind code, so trigger updates and deletes are
+rowid lookups. Postgres: a generated `search_vector` tsvector column with a
+GIN index on each table, built with the `spanish_unaccent` text search
+configuration (Spanish stemming after `unaccent`) so that, as with SQLite's
+`remove_diacritics`, "montana" finds "montaña". Both are created by
+migration 4; migration 7 rebuilds the Postgres columns made before the
+unaccent configuration existed.
+
+Queries are reduced to word tokens matched as prefixes (all must match), so
+user input can never produce query-syntax errors.
+"""
+import html
+import re
+
+from sqlalchemy import text
+
+# (kind, table, date column, rowid code) — the codes are baked into the SQLite triggers
+SOURCES = [
+    ("weekly_memory", "weekly_memories", "week_monday", 1),
+    ("goal", "goals", "created_at", 2),
+    ("unlinked", "unlinked_memories", "created_at", 3),
+]
+
+# Postgres text search configuration used by the generated columns and the queries alike
+TS_CONFIG = "spanish_unaccent"
+
+# highlight sentinels; the snippet is HTML-escaped before they become <mark>
+_START, _STOP = "\x02", "\x03"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+class UnsupportedBackend(Exception):
+    """The database has no full-text search support wired up here."""
+
+
+def tokens(q: str) -> list[str]:
+    return _TOKEN.findall(q.lower())[:16]
+
+
+def _highlight(snippet: str) -> str:
+    return html.escape(snippet).replace(_START, "<mark>").replace(_STOP, "</mark>")
+
+
+def sqlite_ddl() -> list[str]:
+    stmts = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+        "text, kind UNINDEXED, ref_id UNINDEXED, author UNINDEXED, date UNINDEXED, "
+        "tokenize = 'unicode61 remove_diacritics 2')"
+    ]
+    for kind, table, date_col, code in SOURCES:
+        row = f"new.id * 4 + {code}, new.text, '{kind}', new.id, new.author, new.{date_col}"
+        cols = "(rowid, text, kind, ref_id, author, date)"
+        stmts += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_fts {cols} VALUES ({row}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF text, author ON {table} BEGIN "
+            f"DELETE FROM search_fts WHERE rowid = old.id * 4 + {code}; "
+            f"INSERT INTO search_fts {cols} VALUES ({row}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_fts WHERE rowid = old.id * 4 + {code}; END",
+            # backfill rows written before the triggers existed
+            f"INSERT INTO search_fts {cols} SELECT id * 4 + {code}, text, '{kind}', id, author, {date_col} "
+            f"FROM {table} WHERE id * 4 + {code} NOT IN (SELECT rowid FROM search_fts)",
+        ]
+    return stmts
+
+
+def postgres_ddl() -> list[str]:
+    stmts = [
+        "CREATE EXTENSION IF NOT EXISTS unaccent",
+        # CREATE TEXT SEARCH CONFIGURATION has no IF NOT EXISTS
+        "DO $$ BEGIN "
+        f"IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{TS_CONFIG}') THEN "
+        f"CREATE TEXT SEARCH CONFIGURATION {TS_CONFIG} (COPY = spanish); "
+        f"ALTER TEXT SEARCH CONFIGURATION {TS_CONFIG} "
+        "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem; "
+        "END IF; END $$",
+    ]
+    for _, table, _, _ in SOURCES:
+        stmts += [
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('{TS_CONFIG}', coalesce(text, ''))) STORED",
+            f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING GIN (search_vector)",
+        ]
+    return stmts
+
+
+def postgres_rebuild_ddl() -> list[str]:
+    """Drop and recreate the generated columns (and their indexes) with TS_CONFIG."""
+    drops = [f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector" for _, table, _, _ in SOURCES]
+    return drops + postgres_ddl()
+
+
+def _search_sqlite(db, author: str, toks: list[str], limit: int):
+    match = " ".join(f'"{t}"*' for t in toks)
+    return db.execute(
+        text(
+            "SELECT kind, ref_id AS id, date, "
+            f"snippet(search_fts, 0, '{_START}', '{_STOP}', '…', 12) AS snippet, "
+            "bm25(search_fts) AS score "
+            "FROM search_fts WHERE search_fts MATCH :match AND author = :author "
+            "ORDER BY score LIMIT :limit"
+        ),
+        {"match": match, "author": author, "limit": limit},
+    ).all()
+
+
+def _search_postgres(db, author: str, toks: list[str], limit: int):
+    docs = " UNION ALL ".join(
+        f"SELECT '{kind}' AS kind, id, {date_col} AS date, text, ts_rank(search_vector, q) AS score "
+        f"FROM {table}, q WHERE author = :author AND search_vector @@ q"
+        for kind, table, date_col, _ in SOURCES
+    )
+    # headline only the returned page: ts_headline is the expensive part
+    return db.execute(
+        text(
+            f"WITH q AS (SELECT to_tsquery('{TS_CONFIG}', :tsquery) AS q), "
+            f"hits AS (SELECT * FROM ({docs}) d ORDER BY score DESC LIMIT :limit) "
+            f"SELECT kind, id, date, ts_headline('{TS_CONFIG}', text, (SELECT q FROM q), :options) AS snippet, "
+            "-score AS score FROM hits ORDER BY score"
+        ),
+        {
+            "tsquery": " & ".join(f"{t}:*" for t in toks),
+            "author": author,
+            "limit": limit,
+            "options": f"StartSel={_START}, StopSel={_STOP}, MaxWords=24, MinWords=8",
+        },
+    ).all()
+
+
+def search(db, author: str, q: str, limit: int = 20) -> list[dict]:
+    """Ranked hits for the author, best first, with <mark>-highlighted snippets."""
+    toks = tokens(q)
+    if not toks:
+        return []
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        rows = _search_sqlite(db, author, toks, limit)
+    elif dialect == "postgresql":
+        rows = _search_postgres(db, author, toks, limit)
+    else:
+        raise UnsupportedBackend(f"search not supported on {dialect}")
+    return [
+        {
+            "kind": r.kind,
+            "id": r.id,
+            "date": r.date,
+            "snippet": _highlight(r.snippet),
+            # lower is better for bm25; exposed as "higher is better"
+            "score": round(-r.score, 4),
+        }
+        for r in rows
+    ]
@@ -0,0 +1,74 @@
+"""Fast JSON encoding for API responses.
+
+`dumps` produces exactly the bytes FastAPI's default path (Pydantic JSON mode +
+JSONResponse) would, but without per-row model validation or
+`jsonable_encoder`. orjson is used when installed; the stdlib fallback keeps
+the same output format.
+"""
+import json
+from datetime import date, datetime, timedelta
+from typing import Iterable, Sequence
+
+from fastapi.responses import JSONResponse, Response
+
+from .config import FAST_JSON_RESPONSES
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Toggle at runtime (e.g. from benchmarks) to fall back to the validated path
+FAST_JSON = FAST_JSON_RESPONSES
+
+
+def isoformat(dt: datetime) -> str:
+    """ISO 8601 like Pydantic's JSON mode: "Z" for a zero UTC offset."""
+    text = dt.isoformat()
+    if dt.utcoffset() == timedelta(0):
+        text = text[: -len("+00:00")] + "Z"
+    return text
+
+
+def _default(o):
+    if isinstance(o, datetime):
+        return isoformat(o)
+    if isinstance(o, date):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(content) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def dumps(content) -> bytes:
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            # e.g. lone surrogates, which the stdlib encoder still accepts
+            pass
+    return _stdlib_dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def rows_response(rows: Iterable[Sequence], fields: Sequence[str]) -> Response:
+    """Encode column-only query rows as a JSON list of objects keyed by `fields`."""
+    return Response(
+        content=dumps([dict(zip(fields, row)) for row in rows]),
+        media_type="application/json",
+    )
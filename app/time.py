@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from .config import TZ_KEY, YEAR
+from . import calendar
 import os
 
 TZ = ZoneInfo(TZ_KEY)
@@ -26,6 +27,28 @@ def now():
             pass
     return datetime.now(TZ)
 
+def request_now(request=None) -> datetime:
+    """now(), overridable per request via the X-TEST-NOW header (ISO format) for tests."""
+    if request is not None:
+        test_now = request.headers.get("x-test-now")
+        if test_now:
+            try:
+                return localize(datetime.fromisoformat(test_now))
+            except Exception:
+                # ignore parse errors and use real now()
+                pass
+    return now()
+
+def localize(date: datetime) -> datetime:
+    """Return `date` in the configured TZ.
+
+    SQLite drops the offset of timezone-aware columns and returns naive wall-clock
+    values (stored in TZ), while Postgres returns aware datetimes in the session TZ.
+    """
+    if date.tzinfo is None:
+        return date.replace(tzinfo=TZ)
+    return date.astimezone(TZ)
+
 def week_monday(date: datetime) -> datetime:
     date = date.astimezone(TZ)
     return (date - timedelta(days=date.weekday())).replace(
@@ -35,22 +58,20 @@ def week_monday(date: datetime) -> datetime:
 def is_sunday(date: datetime) -> bool:
     return date.weekday() == 6
 
-def is_2026_week(date: datetime) -> bool:
-    return week_monday(date).year == YEAR
+def is_active_week(date: datetime) -> bool:
+    # Weeks belong to their ISO year; writing is open from the first journal YEAR on
+    return calendar.iso_year(date) >= YEAR
 
 def can_write(date: datetime) -> bool:
-    # For safety the default rule is: only allow writes on Sundays in 2026.
+    # For safety the default rule is: only allow writes on Sundays of an active year.
     # For local testing you can set environment variable ALLOW_WRITE=1 to bypass
     # the Sunday restriction (do NOT enable in production).
     if os.environ.get("ALLOW_WRITE") == "1":
-        return is_2026_week(date)
-    return is_sunday(date) and is_2026_week(date)
-
-def all_2026_weeks():
-    d = datetime(2026, 1, 1, tzinfo=TZ)
-    d = week_monday(d)
-    weeks = []
-    while d.year <= 2026:
-        weeks.append(d)
-        d += timedelta(days=7)
-    return weeks
\ No newline at end of file
+        return is_active_week(date)
+    return is_sunday(date) and is_active_week(date)
+
+def all_weeks(year: int):
+    return list(calendar.year_mondays(year))
+
+def weeks_between(start: datetime, end: datetime):
+    return calendar.weeks_between(start, end)
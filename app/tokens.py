@@ -1,49 +1,175 @@
+import hashlib
 import secrets
+import threading
 from datetime import datetime, timedelta, timezone
-from .database import SessionLocal
+from time import monotonic
+from . import database
+from .cache import BloomFilter, TTLCache
+from .config import TOKEN_BLOOM_ERROR_RATE, TOKEN_BLOOM_FILTER, TOKEN_BLOOM_REFRESH
+from .config import TOKEN_NEGATIVE_CACHE_ENTRIES, TOKEN_NEGATIVE_CACHE_TTL
+from .config import TOKEN_PURGE_BATCH, TOKEN_PURGE_RETENTION_MINUTES
 from .models import EmailToken
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.exc import IntegrityError
 
 TOKEN_TTL_MINUTES = 60 * 24  # 24 hours by default
 
 
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class LiveTokenFilter:
+    """Optional Bloom filter of live token digests, rebuilt from the DB when stale.
+
+    A miss means the token was not live at the last rebuild and was not minted
+    by this process since, so it can be rejected without a query.
+    """
+
+    def __init__(self, enabled: bool = TOKEN_BLOOM_FILTER, refresh: float = TOKEN_BLOOM_REFRESH):
+        self.enabled = enabled
+        self.refresh = refresh
+        self._bloom = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self.rebuilds = 0
+        self.rejections = 0
+
+    def _stale(self) -> bool:
+        return self._bloom is None or monotonic() - self._built_at > self.refresh
+
+    def rebuild(self) -> None:
+        db = database.SessionLocal()
+        try:
+            live = db.execute(
+                select(EmailToken.token).where(
+                    EmailToken.used == 0, EmailToken.expires_at >= datetime.now(timezone.utc)
+                )
+            ).scalars().all()
+        finally:
+            db.close()
+        # leave headroom for tokens minted before the next rebuild
+        bloom = BloomFilter(max(1024, 2 * len(live)), TOKEN_BLOOM_ERROR_RATE)
+        for token in live:
+            bloom.add(_digest(token))
+        with self._lock:
+            self._bloom = bloom
+            self._built_at = monotonic()
+            self.rebuilds += 1
+
+    def might_be_live(self, digest: bytes, rebuild: bool = True) -> bool:
+        if not self.enabled:
+            return True
+        if self._stale():
+            # one thread rebuilds; the others fail open to the DB lookup meanwhile
+            if not rebuild or not self._rebuild_lock.acquire(blocking=False):
+                return True
+            try:
+                if self._stale():
+                    self.rebuild()
+            finally:
+                self._rebuild_lock.release()
+        with self._lock:
+            if digest in self._bloom:
+                return True
+            self.rejections += 1
+            return False
+
+    def add(self, digest: bytes) -> None:
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(digest)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "tokens": self._bloom.count if self._bloom is not None else 0,
+                "rebuilds": self.rebuilds,
+                "rejections": self.rejections,
+            }
+
+
+# digests of tokens known not to be usable (unknown, used or expired)
+invalid_tokens = TTLCache(max_entries=TOKEN_NEGATIVE_CACHE_ENTRIES, ttl=TOKEN_NEGATIVE_CACHE_TTL)
+live_tokens = LiveTokenFilter()
+
+
+def _known_invalid(digest: bytes, rebuild: bool = True) -> bool:
+    """True if the token can be rejected without a DB lookup."""
+    if invalid_tokens.get(digest) is not None:
+        return True
+    return not live_tokens.might_be_live(digest, rebuild=rebuild)
+
+
+def _minted(token: str) -> None:
+    digest = _digest(token)
+    invalid_tokens.discard(digest)
+    live_tokens.add(digest)
+
+
+def cache_stats() -> dict:
+    return {"negative": invalid_tokens.stats(), "bloom": live_tokens.stats()}
+
+
 def generate_email_token(author: str, ttl_minutes: int = TOKEN_TTL_MINUTES) -> str:
-    db = SessionLocal()
+    return generate_email_tokens([author], ttl_minutes)[0]
+
+
+MINT_ATTEMPTS = 3
+
+
+def generate_email_tokens(authors: list[str], ttl_minutes: int = TOKEN_TTL_MINUTES) -> list[str]:
+    """Mint one token per author (same order) with a single batched insert and commit.
+
+    The insert is one executemany, so it is not bounded by the driver's limit
+    on bound parameters per statement (SQLite: 32766) at thousands of authors.
+
+    A token collision rolls back the batch and retries it with fresh tokens,
+    at most MINT_ATTEMPTS times (a 256-bit collision is not expected to happen).
+    """
+    if not authors:
+        return []
+    db = database.SessionLocal()
     try:
-        raw = secrets.token_urlsafe(32)
-        expires = datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes)
-        et = EmailToken(token=raw, author=author, expires_at=expires, used=0)
-        db.add(et)
-        db.commit()
-        return raw
-    except IntegrityError:
-        db.rollback()
-        return generate_email_token(author, ttl_minutes)
+        for attempt in range(MINT_ATTEMPTS):
+            expires = datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes)
+            raw = [secrets.token_urlsafe(32) for _ in authors]
+            rows = [
+                {"token": t, "author": a, "expires_at": expires, "used": 0}
+                for t, a in zip(raw, authors)
+            ]
+            try:
+                db.execute(insert(EmailToken), rows)
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                continue
+            for t in raw:
+                _minted(t)
+            return raw
+        raise RuntimeError(f"could not mint unique tokens after {MINT_ATTEMPTS} attempts")
     finally:
         db.close()
 
 
 def consume_email_token(token: str) -> str | None:
     """Mark token as used and return author if valid; otherwise return None."""
-    db = SessionLocal()
+    digest = _digest(token)
+    if _known_invalid(digest):
+        return None
+    db = database.SessionLocal()
     try:
-        now = datetime.now(timezone.utc)
         t = db.query(EmailToken).filter_by(token=token).first()
-        if not t:
-            return None
-        if t.used:
-            return None
-        # normalize expires_at: some DB backends (sqlite) may return naive datetimes
-        expires = t.expires_at
-        if expires.tzinfo is None:
-            from datetime import timezone as _tz
-
-            expires = expires.replace(tzinfo=_tz.utc)
-        if expires < now:
+        if not _is_live(t, datetime.now(timezone.utc)):
+            invalid_tokens.set(digest, True)
             return None
         t.used = 1
         db.add(t)
         db.commit()
+        # spent: any further use is rejected from memory
+        invalid_tokens.set(digest, True)
         return t.author
     finally:
         db.close()
@@ -51,21 +177,113 @@ def consume_email_token(token: str) -> str | None:
 
 def validate_email_token(token: str) -> str | None:
     """Validate token without consuming it. Return author if valid, otherwise None."""
-    db = SessionLocal()
+    digest = _digest(token)
+    if _known_invalid(digest):
+        return None
+    db = database.SessionLocal()
     try:
-        now = datetime.now(timezone.utc)
         t = db.query(EmailToken).filter_by(token=token).first()
-        if not t:
+        if not _is_live(t, datetime.now(timezone.utc)):
+            invalid_tokens.set(digest, True)
             return None
-        if t.used:
+        return t.author
+    finally:
+        db.close()
+
+
+def _is_live(t: EmailToken | None, now: datetime) -> bool:
+    if not t or t.used:
+        return False
+    # normalize expires_at: some DB backends (sqlite) may return naive datetimes
+    expires = t.expires_at
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=timezone.utc)
+    return expires >= now
+
+
+def purge_email_tokens(
+    retention_minutes: int = TOKEN_PURGE_RETENTION_MINUTES,
+    batch_size: int = TOKEN_PURGE_BATCH,
+    max_batches: int | None = None,
+) -> int:
+    """Delete expired (and, without retention, used) tokens in batches. Returns rows deleted.
+
+    Each batch is its own short transaction, so writers minting or consuming
+    tokens are never blocked for the whole purge.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=retention_minutes)
+    # expires_at is indexed, so the expired range is purged first without a
+    # table scan; used tokens have no index and each of their batches scans
+    passes = [(EmailToken.expires_at < cutoff, EmailToken.expires_at)]
+    if retention_minutes <= 0:
+        passes.append((EmailToken.used == 1, EmailToken.id))
+
+    total = 0
+    batches = 0
+    for purgeable, order in passes:
+        while max_batches is None or batches < max_batches:
+            db = database.SessionLocal()
+            try:
+                ids = select(EmailToken.id).where(purgeable).order_by(order).limit(batch_size)
+                deleted = db.execute(delete(EmailToken).where(EmailToken.id.in_(ids))).rowcount
+                db.commit()
+            finally:
+                db.close()
+            total += deleted
+            batches += 1
+            if deleted < batch_size:
+                break
+    return total
+
+
+# Async variants for the AsyncSession-based endpoints (DATABASE_ASYNC=1)
+
+
+async def agenerate_email_token(author: str, ttl_minutes: int = TOKEN_TTL_MINUTES) -> str:
+    """Async generate_email_token; a collision is retried at most MINT_ATTEMPTS times."""
+    async with database.AsyncSessionLocal() as db:
+        for attempt in range(MINT_ATTEMPTS):
+            raw = secrets.token_urlsafe(32)
+            expires = datetime.now(timezone.utc) + timedelta(minutes=ttl_minutes)
+            db.add(EmailToken(token=raw, author=author, expires_at=expires, used=0))
+            try:
+                await db.commit()
+            except IntegrityError:
+                await db.rollback()
+                continue
+            _minted(raw)
+            return raw
+        raise RuntimeError(f"could not mint unique tokens after {MINT_ATTEMPTS} attempts")
+
+
+async def aconsume_email_token(token: str) -> str | None:
+    """Mark token as used and return author if valid; otherwise return None."""
+    digest = _digest(token)
+    # the Bloom filter is only consulted when fresh: rebuilding it is a sync query
+    if _known_invalid(digest, rebuild=False):
+        return None
+    async with database.AsyncSessionLocal() as db:
+        t = (await db.execute(select(EmailToken).filter_by(token=token))).scalar_one_or_none()
+        if not _is_live(t, datetime.now(timezone.utc)):
+            invalid_tokens.set(digest, True)
             return None
-        expires = t.expires_at
-        if expires.tzinfo is None:
-            from datetime import timezone as _tz
+        # conditional update so two concurrent requests cannot both consume it
+        result = await db.execute(
+            update(EmailToken).where(EmailToken.id == t.id, EmailToken.used == 0).values(used=1)
+        )
+        await db.commit()
+        invalid_tokens.set(digest, True)
+        return t.author if result.rowcount == 1 else None
 
-            expires = expires.replace(tzinfo=_tz.utc)
-        if expires < now:
+
+async def avalidate_email_token(token: str) -> str | None:
+    """Validate token without consuming it. Return author if valid, otherwise None."""
+    digest = _digest(token)
+    if _known_invalid(digest, rebuild=False):
+        return None
+    async with database.AsyncSessionLocal() as db:
+        t = (await db.execute(select(EmailToken).filter_by(token=token))).scalar_one_or_none()
+        if not _is_live(t, datetime.now(timezone.utc)):
+            invalid_tokens.set(digest, True)
             return None
         return t.author
-    finally:
-        db.close()
\ No newline at end of file
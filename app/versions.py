@@ -0,0 +1,46 @@
+"""Cheap per-dataset version stamps used for conditional (ETag) responses.
+
+Writers call `bump` inside their transaction; readers call `current`, a
+single primary-key lookup that never touches the dataset's own table. The
+counter lives in the database so every worker/replica sees the same value.
+"""
+from sqlalchemy.orm import Session
+
+from . import crud
+from .models import DatasetVersion
+
+WEEKS = "weeks"
+
+
+def current(db: Session, name: str) -> int:
+    version = db.query(DatasetVersion.version).filter_by(name=name).scalar()
+    return version or 0
+
+
+def bump_stmt(db, name: str):
+    stmt = crud.dialect_insert(db, DatasetVersion.__table__).values(name=name, version=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[DatasetVersion.name],
+        set_={"version": DatasetVersion.version + 1},
+    )
+
+
+def bump(db: Session, name: str) -> None:
+    """Increment the version of `name` (creating it on first use). The caller commits."""
+    db.execute(bump_stmt(db, name))
+
+
+def etag(name: str, version: int) -> str:
+    return f'"{name}-{version}"'
+
+
+def etag_matches(if_none_match: str | None, tag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == "*" or candidate == tag:
+            return True
+    return False
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Benchmark de latencia por mensaje: conexión nueva por email (emailer antiguo)
+frente a los transportes con conexión reutilizada / batch de Resend.
+
+Uso:
+  python scripts/bench_email_transport.py [--messages 50] [--handshake-ms 40]
+
+Usa servidores SMTP/HTTP locales (tests/standins.py); no envía correo real.
+`--handshake-ms` simula el coste de TCP + TLS + login de cada conexión nueva.
+"""
+import argparse
+import smtplib
+import statistics
+import sys
+import time as _time
+from email.message import EmailMessage
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import requests
+
+from app.mail_transport import OutgoingEmail, ResendTransport, SMTPTransport
+from tests.standins import ResendStandin, SMTPStandin
+
+
+def legacy_smtp(port: int, email: OutgoingEmail) -> None:
+    msg = EmailMessage()
+    msg["Subject"] = email.subject
+    msg["From"] = "bench@example.com"
+    msg["To"] = email.to
+    msg.set_content(email.body)
+    with smtplib.SMTP("127.0.0.1", port, timeout=10) as s:
+        s.send_message(msg)
+
+
+def legacy_resend(url: str, email: OutgoingEmail) -> None:
+    requests.post(
+        f"{url}/emails",
+        headers={"Authorization": "Bearer bench"},
+        json={"from": "bench@example.com", "to": [email.to], "subject": email.subject, "text": email.body},
+        timeout=10,
+    )
+
+
+def per_message(fn, emails) -> list[float]:
+    samples = []
+    for e in emails:
+        t0 = _time.perf_counter()
+        fn(e)
+        samples.append((_time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]):
+    print(f"{label:<28} mediana {statistics.median(samples):7.2f} ms/msg   total {sum(samples):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    delay = args.handshake_ms / 1000
+    emails = [OutgoingEmail(f"Recordatorio {i}", "Texto", f"user{i}@example.com") for i in range(args.messages)]
+
+    with SMTPStandin(handshake_delay=delay) as server:
+        report("smtp: conexión por mensaje", per_message(lambda e: legacy_smtp(server.port, e), emails))
+        transport = SMTPTransport("127.0.0.1", server.port, "bench@example.com", use_tls=False, pool_size=1)
+        report("smtp: conexión reutilizada", per_message(transport.send, emails))
+        transport.close()
+
+    with ResendStandin(handshake_delay=delay) as server:
+        report("resend: requests.post", per_message(lambda e: legacy_resend(server.url, e), emails))
+        transport = ResendTransport("bench", "bench@example.com", base_url=server.url)
+        report("resend: Session keep-alive", per_message(transport.send, emails))
+        t0 = _time.perf_counter()
+        transport.send_many(emails)
+        total = (_time.perf_counter() - t0) * 1000
+        print(f"{'resend: /emails/batch':<28} mediana {total / len(emails):7.2f} ms/msg   total {total:8.1f} ms")
+        transport.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Benchmark de búsqueda: índice FTS5 (/search) frente a un escaneo LIKE '%término%'.
+
+Uso:
+  python scripts/bench_search.py [--entries 100000] [--queries 200]
+
+Usa una base temporal nueva con las migraciones aplicadas; no toca memories.db.
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time as _time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app import migrations, search
+from app.database import build_engine
+from app.models import Goal, UnlinkedMemory
+
+# vocabulario sintético amplio: cada palabra aparece en ~0.5% de las entradas,
+# como un término de búsqueda real (no una palabra vacía)
+_SYLLABLES = "ma mon ta ña pla ya ce na fa mi lia via je li bro pe lí cu la tra ba jo mú si ca".split()
+_rng = random.Random(1)
+WORDS = sorted({"".join(_rng.choice(_SYLLABLES) for _ in range(3)) for _ in range(8000)})
+
+
+def _text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 60)))
+
+
+def seed(Session, entries: int):
+    rng = random.Random(42)
+    start = datetime(2026, 1, 1)
+    with Session() as db:
+        for model in (Goal, UnlinkedMemory):
+            rows = [
+                {
+                    "text": _text(rng),
+                    "author": rng.choice(("Jaime", "Gabi")),
+                    "created_at": start + timedelta(minutes=i),
+                }
+                for i in range(entries // 2)
+            ]
+            db.execute(insert(model), rows)
+        db.commit()
+
+
+def like_scan(db, author: str, term: str, limit: int):
+    pattern = f"%{term}%"
+    hits = []
+    for model in (Goal, UnlinkedMemory):
+        hits += db.execute(
+            select(model.id, model.text)
+            .where(model.author == author, model.text.like(pattern))
+            .limit(limit)
+        ).all()
+    return hits[:limit]
+
+
+def timed(fn, queries: list[str]) -> list[float]:
+    samples = []
+    for q in queries:
+        t0 = _time.perf_counter()
+        fn(q)
+        samples.append((_time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def report(label: str, samples: list[float]):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:>6}: mediana {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    engine = build_engine(f"sqlite:///{tmp}/bench.db")
+    migrations.upgrade(engine)
+    Session = sessionmaker(bind=engine)
+
+    t0 = _time.perf_counter()
+    seed(Session, args.entries)
+    print(f"{args.entries} entradas insertadas (con triggers FTS) en {_time.perf_counter() - t0:.1f} s")
+
+    rng = random.Random(7)
+    queries = [rng.choice(WORDS) for _ in range(args.queries)]
+    with Session() as db:
+        report("fts5", timed(lambda q: search.search(db, "Jaime", q, 20), queries))
+        report("like", timed(lambda q: like_scan(db, "Jaime", q, 20), queries))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
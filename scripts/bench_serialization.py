@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: serialización de /goals con 10k filas, ruta rápida vs ruta validada.
+
+Uso:
+  python scripts/bench_serialization.py [--rows 10000] [--repeat 20]
+
+Usa una base SQLite temporal; no toca memories.db.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time as _time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Point the app at a throwaway database before it is imported
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP_DIR}/bench.db"
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from starlette.responses import JSONResponse
+
+import app.main as main
+from app import serialization
+from app.auth import generate_token
+from app.database import SessionLocal, engine
+from app.models import Base, Goal
+from app.schemas import GoalOut
+
+
+def _timeit(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = _time.perf_counter()
+        fn()
+        samples.append((_time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def run(rows: int, repeat: int):
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    start = datetime(2026, 1, 1, tzinfo=main.time.TZ)
+    db.add_all(
+        Goal(text=f"Objetivo número {i} — más texto", author="Jaime", created_at=start + timedelta(minutes=i))
+        for i in range(rows)
+    )
+    db.commit()
+
+    fields = tuple(GoalOut.model_fields)
+    orm_rows = db.query(Goal).filter_by(author="Jaime").order_by(Goal.created_at.desc()).all()
+    tuple_rows = (
+        db.query(*(getattr(Goal, f) for f in fields))
+        .filter_by(author="Jaime")
+        .order_by(Goal.created_at.desc())
+        .all()
+    )
+
+    def validated():
+        return JSONResponse(content=jsonable_encoder([GoalOut.model_validate(o) for o in orm_rows])).body
+
+    def fast():
+        return serialization.rows_response(tuple_rows, fields).body
+
+    assert validated() == fast(), "fast path output differs"
+
+    print(f"rows={rows} orjson={serialization.ORJSON_AVAILABLE} (median of {repeat}, ms)")
+    print(f"  encode only   validated={_timeit(validated, repeat):8.2f}  fast={_timeit(fast, repeat):8.2f}")
+
+    client = TestClient(main.app)
+    headers = {"Authorization": f"Bearer {generate_token('Jaime')}"}
+    results = {}
+    for mode in (False, True):
+        serialization.FAST_JSON = mode
+        results[mode] = _timeit(lambda: client.get("/goals", headers=headers), repeat)
+    print(f"  GET /goals    validated={results[False]:8.2f}  fast={results[True]:8.2f}")
+
+    db.close()
+    engine.dispose()
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark de concurrencia lectores/escritores para los perfiles SQLite ("default" vs "production").
+
+Uso:
+  python scripts/bench_sqlite_profile.py [--readers 8] [--writers 2] [--seconds 3]
+
+Cada perfil usa una base temporal nueva; no toca memories.db.
+"""
+import argparse
+import shutil
+import sys
+import tempfile
+import threading
+import time as _time
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import build_engine
+from app.models import Base, Goal
+
+
+def run_profile(profile: str, readers: int, writers: int, seconds: float) -> dict:
+    tmp = tempfile.mkdtemp()
+    engine = build_engine(f"sqlite:///{tmp}/bench.db", sqlite_profile=profile)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        now = datetime.now(timezone.utc)
+        db.add_all(Goal(text=f"seed {i}", author="Jaime", created_at=now) for i in range(5000))
+        db.commit()
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = _time.perf_counter() + seconds
+
+    def reader():
+        n = errors = 0
+        while _time.perf_counter() < stop:
+            try:
+                with Session() as db:
+                    db.execute(select(func.count()).select_from(Goal).where(Goal.author == "Jaime")).scalar()
+                n += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts["reads"] += n
+            counts["errors"] += errors
+
+    def writer():
+        n = errors = 0
+        while _time.perf_counter() < stop:
+            try:
+                with Session() as db:
+                    db.add(Goal(text="write", author="Gabi", created_at=datetime.now(timezone.utc)))
+                    db.commit()
+                n += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts["writes"] += n
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    engine.dispose()
+    shutil.rmtree(tmp, ignore_errors=True)
+    return {k: v / seconds if k != "errors" else v for k, v in counts.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print(f"readers={args.readers} writers={args.writers} seconds={args.seconds}")
+    for profile in ("default", "production"):
+        r = run_profile(profile, args.readers, args.writers, args.seconds)
+        print(f"  {profile:<10} reads/s={r['reads']:9.1f}  writes/s={r['writes']:8.1f}  errors={r['errors']}")
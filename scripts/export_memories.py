@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Exporta todos los recuerdos semanales, objetivos y recuerdos sueltos como NDJSON o CSV.
+
+Uso:
+  python scripts/export_memories.py                       # NDJSON a stdout
+  python scripts/export_memories.py --format csv -o backup.csv
+  python scripts/export_memories.py --gzip -o backup.ndjson.gz
+
+Usa DATABASE_URL (por defecto memories.db). La exportación se hace en streaming:
+la memoria usada no depende del tamaño de la base.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# ensure project root is on sys.path so `import app` works
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import export
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--format", choices=export.FORMATS, default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("-o", "--output", help="fichero de salida (por defecto stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        total = 0
+        for chunk in export.stream(args.format, args.gzip):
+            out.write(chunk)
+            total += len(chunk)
+    finally:
+        if args.output:
+            out.close()
+    print(f"Exported {total} bytes", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
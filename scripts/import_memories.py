@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Importa recuerdos en bloque desde NDJSON (el formato de scripts/export_memories.py).
+
+Uso:
+  python scripts/import_memories.py backup.ndjson [--batch-size 500]
+  python scripts/import_memories.py backup.ndjson.gz
+  cat backup.ndjson | python scripts/import_memories.py -
+
+Cada línea es un objeto con "type" ("weekly_memory", "goal" o "unlinked"),
+"author", "text", "created_at" y, para recuerdos semanales, "week_monday"
+(y opcionalmente "updated_at"). Los recuerdos semanales se actualizan si ya
+existen para esa semana y autor; objetivos y recuerdos sueltos, si ya existe
+su "id". Usa DATABASE_URL (por defecto memories.db).
+"""
+import argparse
+import gzip
+import sys
+from pathlib import Path
+
+# ensure project root is on sys.path so `import app` works
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app import importer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="fichero NDJSON (.gz admitido) o - para stdin")
+    parser.add_argument("--batch-size", type=int, default=importer.DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+    if not 1 <= args.batch_size <= importer.MAX_BATCH_SIZE:
+        parser.error(f"--batch-size debe estar entre 1 y {importer.MAX_BATCH_SIZE}")
+
+    if args.path == "-":
+        source = sys.stdin.buffer
+    elif args.path.endswith(".gz"):
+        source = gzip.open(args.path, "rb")
+    else:
+        source = open(args.path, "rb")
+
+    def report(b):
+        print(f"batch {b['batch']}: {b['rows']} rows ({b['invalid']} invalid) in {b['seconds']}s -> {b['rows_per_s']} rows/s")
+
+    try:
+        result = importer.import_lines(source, args.batch_size, on_batch=report)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+
+    print("Imported:", result["imported"])
+    for err in result["errors"]:
+        print(f"  line {err['line']}: {err['error']}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,17 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 import app.main as main
+from app.models import Base
 
 from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker
 
 
 def setup_test_db():
-    test_engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    test_engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
     TestSessionLocal = sessionmaker(bind=test_engine)
 
     import app.database as database
@@ -22,10 +26,9 @@ def setup_test_db():
     database.engine = test_engine
     database.SessionLocal = TestSessionLocal
 
-    main.engine = test_engine
     main.SessionLocal = TestSessionLocal
 
-    main.Base.metadata.create_all(bind=test_engine)
+    Base.metadata.create_all(bind=test_engine)
 
     return TestSessionLocal
 
@@ -37,3 +40,24 @@ TestSessionLocal = setup_test_db()
 def client():
     client = TestClient(main.app)
     yield client
+
+
+@pytest.fixture
+def admin_settings(monkeypatch):
+    """Set (or, with None, unset) admin env vars and reload the admin settings.
+
+    Once the test ends the environment is restored first and the settings
+    (and their verified-token cache) are reloaded from it, so nothing leaks
+    into later tests.
+    """
+    def configure(**env):
+        for name, value in env.items():
+            if value is None:
+                monkeypatch.delenv(name, raising=False)
+            else:
+                monkeypatch.setenv(name, value)
+        return main.admin_auth.load_settings()
+
+    yield configure
+    monkeypatch.undo()
+    main.admin_auth.load_settings()
@@ -0,0 +1,157 @@
+"""Local stand-ins for the SMTP server and the Resend HTTP API.
+
+Both listen on 127.0.0.1 with an ephemeral port, record what they receive and
+count accepted connections, so tests can assert on connection reuse.
+`handshake_delay` adds latency to each new connection (a stand-in for the
+TCP + TLS + login cost of the real services).
+"""
+import json
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+            server.open_sockets.append(self.connection)
+        time.sleep(server.handshake_delay)
+        self._reply("220 standin ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            with server.lock:
+                server.commands.append(verb)
+            if verb == "EHLO":
+                self._reply("250-standin", "250 8BITMIME")
+            elif verb == "HELO":
+                self._reply("250 standin")
+            elif verb == "DATA":
+                self._reply("354 end with <CRLF>.<CRLF>")
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if chunk in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(chunk)
+                with server.lock:
+                    server.messages.append(b"".join(data).decode("utf-8", "replace"))
+                if server.drop_after_data:
+                    # accepted, but the connection dies before the client hears so
+                    return
+                self._reply("250 queued")
+            elif verb == "QUIT":
+                self._reply("221 bye")
+                return
+            elif verb == "RCPT" and any(addr in command for addr in server.reject_rcpt):
+                self._reply("550 no such user")
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self._reply("250 ok")
+
+    def _reply(self, *lines):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode("utf-8"))
+
+
+class SMTPStandin(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay: float = 0.0, reject_rcpt=(), drop_after_data: bool = False):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.handshake_delay = handshake_delay
+        self.reject_rcpt = set(reject_rcpt)
+        self.drop_after_data = drop_after_data
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.messages = []
+        self.commands = []
+        self.open_sockets = []
+
+    def drop_connections(self):
+        """Close every client connection, like a server timing out idle sessions."""
+        with self.lock:
+            sockets, self.open_sockets = self.open_sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class _ResendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    # headers and body are separate writes: without this, delayed ACKs add ~40 ms
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        time.sleep(server.handshake_delay)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"null")
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get("Authorization"), payload))
+            status = server.status
+        if self.path == "/emails/batch":
+            body = {"data": [{"id": f"batch-{i}"} for i in range(len(payload))]}
+        else:
+            body = {"id": "single"}
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+class ResendStandin(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handshake_delay: float = 0.0, status: int = 200):
+        super().__init__(("127.0.0.1", 0), _ResendHandler)
+        self.handshake_delay = handshake_delay
+        self.status = status
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
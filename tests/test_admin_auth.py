@@ -0,0 +1,109 @@
+import sys
+import os
+import asyncio
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.hash import pbkdf2_sha256
+
+import app.main as main
+from app import admin_auth
+
+
+@pytest.fixture
+def admin_env(admin_settings, monkeypatch):
+    monkeypatch.setattr(admin_auth, "limiter", admin_auth.TokenBucketLimiter(burst=3, per_minute=1))
+    admin_settings(ADMIN_USER="admin", ADMIN_PASSWORD_HASH=pbkdf2_sha256.using(rounds=1000).hash("s3cret"))
+    yield
+    admin_auth.shutdown()
+
+
+def test_login_verifies_in_pool_and_records_latency(admin_env):
+    client = TestClient(main.app)
+    before = admin_auth.stats()["verifications"]
+    r = client.post("/admin/login", json={"username": "admin", "password": "s3cret"})
+    assert r.status_code == 200
+    assert main.verify_admin_jwt(r.json()["token"])
+    assert client.post("/admin/login", json={"username": "admin", "password": "nope"}).status_code == 401
+    assert admin_auth.stats()["verifications"] == before + 2
+
+
+def test_pool_does_not_fork(admin_env):
+    assert admin_auth._pool()._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_login_throttled_before_hashing(admin_env, monkeypatch):
+    client = TestClient(main.app)
+    for _ in range(3):
+        assert client.post("/admin/login", json={"username": "admin", "password": "nope"}).status_code == 401
+
+    def no_hashing(*args):
+        raise AssertionError("throttled attempts must not reach pbkdf2")
+
+    monkeypatch.setattr(admin_auth, "verify_password", no_hashing)
+    r = client.post("/admin/login", json={"username": "admin", "password": "s3cret"})
+    assert r.status_code == 429
+    assert admin_auth.limiter.rejected >= 1
+
+
+def test_login_verify_error_is_not_echoed(admin_env, monkeypatch):
+    async def broken(*args):
+        raise RuntimeError("secret backend detail")
+
+    monkeypatch.setattr(admin_auth, "verify_password", broken)
+    r = TestClient(main.app).post("/admin/login", json={"username": "admin", "password": "s3cret"})
+    assert r.status_code == 500
+    assert "secret backend detail" not in r.text
+
+
+def test_token_bucket_is_per_key_and_refills(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(admin_auth, "monotonic", lambda: clock[0])
+    limiter = admin_auth.TokenBucketLimiter(burst=2, per_minute=60)
+    assert limiter.allow("ip:a") and limiter.allow("ip:a")
+    assert not limiter.allow("ip:a")
+    assert limiter.allow("ip:b")
+    clock[0] += 1.0  # one token per second
+    assert limiter.allow("ip:a")
+    assert not limiter.allow("ip:a")
+
+
+def test_verify_rejects_when_all_slots_busy(monkeypatch):
+    monkeypatch.setattr(admin_auth, "_slots", threading.BoundedSemaphore(1))
+    admin_auth._slots.acquire()
+    with pytest.raises(admin_auth.Busy):
+        asyncio.run(admin_auth.verify_password("x", "y"))
+
+
+def test_require_admin_caches_verified_tokens(admin_env, monkeypatch):
+    client = TestClient(main.app)
+    headers = {"Authorization": f"Bearer {main.create_admin_jwt('admin')}"}
+    assert client.get("/admin/ping", headers=headers).status_code == 200
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("cached admin tokens must not be decoded again")
+
+    monkeypatch.setattr(admin_auth.jwt, "decode", no_decode)
+    assert client.get("/admin/ping", headers=headers).status_code == 200
+    assert client.get("/admin/env-check", headers=headers).json() == {"admin_user_set": True, "admin_hash_set": True}
+    assert client.get("/admin/ping").status_code == 401
+
+
+def test_cached_admin_token_expires(admin_env, monkeypatch):
+    token = main.create_admin_jwt("admin")
+    assert admin_auth.verify_token(token) is not None
+    # past the token's own exp the cache entry is dropped
+    monkeypatch.setattr(admin_auth, "time", lambda: 4102444800.0)
+    assert admin_auth.verify_token(token) is None
+
+
+def test_require_admin_unconfigured(admin_settings):
+    admin_settings(ADMIN_USER=None)
+    client = TestClient(main.app)
+    r = client.get("/admin/ping", headers={"Authorization": "Bearer whatever"})
+    assert r.status_code == 503
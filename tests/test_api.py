@@ -1,6 +1,7 @@
 import sys
 import os
-from datetime import datetime
+import json
+from datetime import datetime, date
 
 # ensure project root is on sys.path so `import app` works under pytest
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -9,14 +10,18 @@ if ROOT not in sys.path:
 
 from fastapi.testclient import TestClient
 import app.main as main
+from app.models import Base
 from app.schemas import WeeklyMemoryCreate
 
 from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker
 
 # Use an in-memory SQLite DB for tests to avoid locking the project's file DB
 def setup_test_db():
-    test_engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    test_engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
     TestSessionLocal = sessionmaker(bind=test_engine)
 
     # Rebind in app.database and in main so code uses the test session
@@ -25,11 +30,10 @@ def setup_test_db():
     database.engine = test_engine
     database.SessionLocal = TestSessionLocal
 
-    main.engine = test_engine
     main.SessionLocal = TestSessionLocal
 
     # create tables on the test engine
-    main.Base.metadata.create_all(bind=test_engine)
+    Base.metadata.create_all(bind=test_engine)
 
     return TestSessionLocal
 
@@ -39,7 +43,7 @@ TestSessionLocal = setup_test_db()
 
 def test_get_weeks_initial():
     db = TestSessionLocal()
-    result = main.get_weeks(db=db)
+    result = json.loads(main.get_weeks(db=db).body)
     assert isinstance(result, list)
     assert any(item["week_monday"].startswith("2026-") for item in result)
     db.close()
@@ -60,14 +64,58 @@ def test_post_and_duplicate(monkeypatch):
     assert created.text == payload.text
     assert created.author == "Jaime"
 
-    # duplicate should raise
-    try:
-        main.create_weekly_memory(payload=payload, db=db, author="Jaime")
-        assert False, "Expected duplicate to raise"
-    except Exception as e:
-        assert "Week already written" in str(e)
+    # a second submission for the same week updates the entry in place
+    later = datetime(2026, 1, 11, 20, 0, tzinfo=main.time.TZ)
+    monkeypatch.setattr(main.time, "now", lambda: later)
+    updated = main.create_weekly_memory(
+        payload=WeeklyMemoryCreate(text="Corregido"), db=db, author="Jaime"
+    )
+    assert updated.text == "Corregido"
+    assert updated.created_at == created.created_at
+    assert updated.updated_at != created.updated_at
+
+    from app.models import WeeklyMemory
+    assert db.query(WeeklyMemory).filter_by(author="Jaime", week_monday=created.week_monday).count() == 1
+
+    db.close()
+
 
+def test_post_concurrent_upserts(monkeypatch, tmp_path):
+    import threading
+    from app.models import WeeklyMemory
+
+    # file-backed DB so every thread gets its own connection
+    engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(main.time, "now", lambda: datetime(2026, 1, 18, 12, 0, tzinfo=main.time.TZ))
+
+    errors = []
+    barrier = threading.Barrier(8)
+
+    def submit(n):
+        db = Session()
+        try:
+            barrier.wait()
+            for i in range(10):
+                main.create_weekly_memory(payload=WeeklyMemoryCreate(text=f"{n}-{i}"), db=db, author="Gabi")
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=submit, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    db = Session()
+    assert db.query(WeeklyMemory).count() == 1
+    assert main.versions.current(db, main.versions.WEEKS) == 80
     db.close()
+    engine.dispose()
 
 
 def test_post_forbidden(monkeypatch):
@@ -87,3 +135,164 @@ def test_post_forbidden(monkeypatch):
         assert "Not writable now" in str(e)
 
     db.close()
+
+
+def test_get_weeks_window():
+    from app.models import WeeklyMemory
+
+    db = TestSessionLocal()
+    when = datetime(2027, 3, 14, 12, 0, tzinfo=main.time.TZ)
+    monday = main.time.week_monday(when)
+    db.add(WeeklyMemory(week_monday=monday, text="Marzo", author="Gabi", created_at=when, updated_at=when))
+    db.commit()
+
+    weeks = json.loads(main.get_weeks(db=db, year=2027).body)
+    assert len(weeks) == 52
+    assert all(w["week_monday"].startswith("2027-") for w in weeks)
+    written = [w for w in weeks if w["status"] == "written"]
+    assert [w["week_monday"] for w in written] == [monday.isoformat()]
+    assert written[0]["memories"][0]["text"] == "Marzo"
+
+    window = json.loads(main.get_weeks(db=db, from_=date(2027, 3, 1), to=date(2027, 3, 31)).body)
+    assert [w["week_monday"][:10] for w in window] == [
+        "2027-03-01", "2027-03-08", "2027-03-15", "2027-03-22", "2027-03-29"
+    ]
+    assert sum(w["status"] == "written" for w in window) == 1
+
+    db.close()
+
+
+def test_get_weeks_defaults_to_current_iso_year(client):
+    weeks = client.get("/weeks", headers={"X-TEST-NOW": "2027-01-10T12:00:00"}).json()
+    assert weeks[0]["week_monday"].startswith("2027-01-04")
+    # before the first journal year the default stays on YEAR
+    weeks = client.get("/weeks", headers={"X-TEST-NOW": "2025-06-01T12:00:00"}).json()
+    assert weeks[0]["week_monday"] == main.time.all_weeks(main.YEAR)[0].isoformat()
+
+
+def test_get_weeks_etag(client, monkeypatch):
+    first = client.get("/weeks")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    again = client.get("/weeks", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+
+    # any write bumps the version and invalidates the tag
+    monkeypatch.setattr(main.time, "now", lambda: datetime(2026, 2, 1, 12, 0, tzinfo=main.time.TZ))
+    db = TestSessionLocal()
+    main.create_weekly_memory(payload=WeeklyMemoryCreate(text="Febrero"), db=db, author="Gabi")
+    db.close()
+
+    after = client.get("/weeks", headers={"If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["etag"] != etag
+    assert any(w["status"] == "written" for w in after.json())
+
+
+def test_get_weeks_cache():
+    db = TestSessionLocal()
+    main.weeks_cache.clear()
+    before = main.weeks_cache.stats()
+
+    first = main.get_weeks(db=db, year=2028).body
+    second = main.get_weeks(db=db, year=2028).body
+    assert first == second
+    stats = main.weeks_cache.stats()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+    db.close()
+
+
+def test_lru_cache_bounds():
+    from app.cache import LRUCache
+
+    cache = LRUCache(max_entries=2, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")  # over both bounds: evicts least recently used "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234" and cache.get("c") == b"1234"
+    assert cache.stats()["bytes"] == 8
+
+
+def test_fast_json_lists_byte_identical(client, monkeypatch):
+    from starlette.responses import JSONResponse as StarletteJSONResponse
+    from app import serialization
+    from app.auth import generate_token
+    from app.models import Goal, UnlinkedMemory
+
+    db = TestSessionLocal()
+    when = datetime(2026, 3, 1, 9, 30, 0, 1234, tzinfo=main.time.TZ)
+    for text in ["Correr 10k", "Año nuevo   \"citas\" \\ \x01", "😀"]:
+        db.add(Goal(text=text, author="Gabi", created_at=when))
+        db.add(UnlinkedMemory(text=text, author="Gabi", created_at=when))
+    db.commit()
+    db.close()
+
+    headers = {"Authorization": f"Bearer {generate_token('Gabi')}"}
+    for path in ["/goals", "/unlinked"]:
+        monkeypatch.setattr(serialization, "FAST_JSON", True)
+        fast = client.get(path, headers=headers)
+        monkeypatch.setattr(serialization, "FAST_JSON", False)
+        slow = client.get(path, headers=headers)
+        assert fast.status_code == slow.status_code == 200
+        assert len(fast.json()) == 3
+        assert fast.content == slow.content
+        assert fast.content == StarletteJSONResponse(content=slow.json()).body
+        assert fast.headers["content-type"] == slow.headers["content-type"]
+
+
+def test_serialization_matches_pydantic_datetimes():
+    from datetime import timezone
+    from fastapi.encoders import jsonable_encoder
+    from starlette.responses import JSONResponse as StarletteJSONResponse
+    from app import serialization
+    from app.schemas import GoalOut
+
+    rows = [
+        (1, "utc", "Jaime", datetime(2026, 1, 1, 8, 0, tzinfo=timezone.utc)),
+        (2, "madrid", "Jaime", datetime(2026, 6, 1, 8, 0, 0, 500, tzinfo=main.time.TZ)),
+        (3, "naive", "Jaime", datetime(2026, 6, 1, 8, 0)),
+    ]
+    fields = tuple(GoalOut.model_fields)
+    expected = StarletteJSONResponse(
+        content=jsonable_encoder([GoalOut(**dict(zip(fields, r))) for r in rows])
+    ).body
+    assert serialization.rows_response(rows, fields).body == expected
+    assert serialization._stdlib_dumps([dict(zip(fields, r)) for r in rows]) == expected
+
+
+def test_goals_keyset_pagination(client):
+    from datetime import timedelta
+    from app.auth import generate_token
+    from app.models import Goal
+
+    db = TestSessionLocal()
+    base = datetime(2026, 4, 1, 10, 0, tzinfo=main.time.TZ)
+    # two rows share a timestamp: the id breaks the tie
+    for i, minutes in enumerate([0, 1, 2, 2, 3]):
+        db.add(Goal(text=f"pagina {i}", author="Jaime", created_at=base + timedelta(minutes=minutes)))
+    db.commit()
+    db.close()
+
+    headers = {"Authorization": f"Bearer {generate_token('Jaime')}"}
+    legacy = client.get("/goals", headers=headers).json()
+    assert isinstance(legacy, list)
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/goals", params=params, headers=headers).json()
+        assert len(page["items"]) <= 2
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [g["id"] for g in seen] == [g["id"] for g in legacy]
+    assert client.get("/goals", params={"cursor": "nope"}, headers=headers).status_code == 400
@@ -0,0 +1,111 @@
+import sys
+import os
+import asyncio
+from datetime import datetime
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("greenlet")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import async_api, database, serialization, tokens
+from app.auth import generate_token
+from app.database import async_url
+from app.models import Base
+
+
+@pytest.fixture
+def async_client(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    Base.metadata.create_all(bind=sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(async_url(url))
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+
+    app = FastAPI(default_response_class=serialization.FastJSONResponse)
+    app.include_router(async_api.router)
+    yield TestClient(app)
+    asyncio.run(async_engine.dispose())
+
+
+def test_async_url():
+    assert async_url("sqlite:///./memories.db") == "sqlite+aiosqlite:///./memories.db"
+    assert async_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+
+
+def test_async_crud(async_client):
+    headers = {"Authorization": f"Bearer {generate_token('Jaime')}"}
+
+    created = async_client.post("/goals", json={"text": "Aprender a nadar"}, headers=headers)
+    assert created.status_code == 200
+    goal = created.json()
+    assert goal["author"] == "Jaime" and goal["id"] > 0
+
+    listed = async_client.get("/goals", headers=headers)
+    assert [g["text"] for g in listed.json()] == ["Aprender a nadar"]
+
+    assert async_client.delete(f"/goals/{goal['id']}", headers=headers).json() == {"ok": True}
+    assert async_client.delete(f"/goals/{goal['id']}", headers=headers).status_code == 404
+
+    assert async_client.post("/unlinked", json={"text": "Playa"}, headers=headers).status_code == 200
+    assert len(async_client.get("/unlinked", headers=headers).json()) == 1
+
+
+@pytest.mark.parametrize("path", ["/goals", "/unlinked"])
+def test_async_create_matches_sync_body(async_client, client, monkeypatch, path):
+    monkeypatch.setenv("TEST_NOW", "2026-10-18T12:32:28.253605")
+    headers = {"Authorization": f"Bearer {generate_token('Gabi')}"}
+    sync_body = client.post(path, json={"text": "Igual"}, headers=headers).json()
+    async_body = async_client.post(path, json={"text": "Igual"}, headers=headers).json()
+    # ids come from two different databases
+    del sync_body["id"], async_body["id"]
+    assert async_body == sync_body
+
+
+def test_async_weekly_memory_upsert(async_client):
+    headers = {"Authorization": f"Bearer {generate_token('Gabi')}", "X-TEST-NOW": "2026-01-11T12:00:00"}
+
+    first = async_client.post("/weekly-memory", json={"text": "Uno"}, headers=headers)
+    second = async_client.post("/weekly-memory", json={"text": "Dos"}, headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert second.json()["text"] == "Dos"
+    assert second.json()["created_at"] == first.json()["created_at"]
+
+    monday = dict(headers, **{"X-TEST-NOW": "2026-01-12T12:00:00"})
+    assert async_client.post("/weekly-memory", json={"text": "Lunes"}, headers=monday).status_code == 403
+
+
+def test_async_email_tokens(async_client):
+    async def flow():
+        tok = await tokens.agenerate_email_token("Gabi", ttl_minutes=1)
+        assert await tokens.avalidate_email_token(tok) == "Gabi"
+        assert await tokens.aconsume_email_token(tok) == "Gabi"
+        assert await tokens.aconsume_email_token(tok) is None
+        return tok
+
+    tok = asyncio.run(flow())
+    # consumed tokens are rejected by the async auth dependency
+    assert async_client.get("/goals", headers={"Authorization": f"Bearer {tok}"}).status_code == 401
+
+
+def test_async_mint_gives_up_after_bounded_attempts(async_client, monkeypatch):
+    async def flow():
+        taken = await tokens.agenerate_email_token("Gabi")
+        calls = []
+        monkeypatch.setattr(tokens.secrets, "token_urlsafe", lambda n: calls.append(n) or taken)
+        with pytest.raises(RuntimeError):
+            await tokens.agenerate_email_token("Gabi")
+        return calls
+
+    assert len(asyncio.run(flow())) == tokens.MINT_ATTEMPTS
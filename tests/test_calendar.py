@@ -0,0 +1,43 @@
+import sys
+import os
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import calendar
+from app.time import TZ, can_write
+
+
+def test_year_mondays_iso_weeks():
+    weeks_2026 = calendar.year_mondays(2026)
+    assert len(weeks_2026) == 53
+    assert weeks_2026[0] == datetime(2025, 12, 29, tzinfo=TZ)
+    assert weeks_2026[-1] == datetime(2026, 12, 28, tzinfo=TZ)
+    assert all(w.weekday() == 0 and w.hour == 0 for w in weeks_2026)
+
+    weeks_2027 = calendar.year_mondays(2027)
+    assert len(weeks_2027) == 52
+    assert weeks_2027[0] == datetime(2027, 1, 4, tzinfo=TZ)
+
+    # memoized: same object on every call
+    assert calendar.year_mondays(2027) is weeks_2027
+
+
+def test_week_index_and_range():
+    # Sunday Jan 3 2027 still belongs to ISO week 53 of 2026
+    assert calendar.week_index(datetime(2027, 1, 3, 20, 0, tzinfo=TZ)) == (2026, 52)
+    assert calendar.week_of(datetime(2026, 3, 29, 23, 0, tzinfo=TZ)) == datetime(2026, 3, 23, tzinfo=TZ)
+
+    weeks = calendar.weeks_between(datetime(2026, 12, 20, tzinfo=TZ), datetime(2027, 1, 12, tzinfo=TZ))
+    assert [w.date().isoformat() for w in weeks] == [
+        "2026-12-14", "2026-12-21", "2026-12-28", "2027-01-04", "2027-01-11"
+    ]
+
+
+def test_can_write_follows_iso_year():
+    # Sunday Jan 4 2026 closes ISO week 1 of 2026
+    assert can_write(datetime(2026, 1, 4, 12, 0, tzinfo=TZ))
+    assert can_write(datetime(2027, 5, 9, 12, 0, tzinfo=TZ))
+    assert not can_write(datetime(2025, 12, 28, 12, 0, tzinfo=TZ))
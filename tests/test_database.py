@@ -0,0 +1,84 @@
+import sys
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import text
+
+from app.database import build_engine
+
+
+def _pragma(engine, name):
+    with engine.connect() as conn:
+        return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_sqlite_production_profile(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'prod.db'}", sqlite_profile="production")
+    assert _pragma(engine, "journal_mode") == "wal"
+    assert _pragma(engine, "synchronous") == 1  # NORMAL
+    assert _pragma(engine, "busy_timeout") == 5000
+    assert _pragma(engine, "temp_store") == 2  # MEMORY
+    assert engine.pool.size() == 8
+    engine.dispose()
+
+
+def test_sqlite_default_profile(tmp_path):
+    engine = build_engine(f"sqlite:///{tmp_path / 'plain.db'}", sqlite_profile="default")
+    assert _pragma(engine, "journal_mode") == "delete"
+    engine.dispose()
+
+    # in-memory databases never get the file pragmas
+    memory = build_engine("sqlite:///:memory:", sqlite_profile="production")
+    assert _pragma(memory, "journal_mode") == "memory"
+
+
+def test_postgres_pool_options():
+    from sqlalchemy.pool import QueuePool
+    from app.database import engine_options
+
+    options = engine_options("postgresql://user:pw@localhost:5432/memories")
+    assert options["pool_pre_ping"] is True
+    assert options["pool_recycle"] == 1800
+    assert options["pool_size"] == 5 and options["max_overflow"] == 10
+    assert options["connect_args"] == {"options": "-c statement_timeout=15000"}
+
+    # building the engine does not connect
+    engine = build_engine("postgresql+psycopg2://user:pw@localhost:5432/memories")
+    assert isinstance(engine.pool, QueuePool)
+    engine.dispose()
+
+
+def test_pool_stats_saturation(tmp_path):
+    import threading
+    import pytest
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+    from app.database import pool_stats
+
+    # file SQLite stands in for Postgres: same instrumented QueuePool
+    engine = build_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", pool_size=1, max_overflow=0, pool_timeout=0.5
+    )
+    held = engine.connect()
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 1 and stats["saturated"] == 1
+
+    # a second checkout waits until the first connection is returned
+    threading.Timer(0.1, held.close).start()
+    with engine.connect():
+        pass
+    stats = pool_stats(engine)
+    assert stats["checkouts"] == 2
+    assert stats["max_wait_ms"] >= 50
+
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    held.close()
+    assert pool_stats(engine)["timeouts"] == 1
+
+    # counters survive dispose() recreating the pool
+    engine.dispose()
+    assert pool_stats(engine)["checkouts"] == 3
@@ -0,0 +1,66 @@
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import app.main as main
+from app import database, export
+from app.models import Goal, UnlinkedMemory, WeeklyMemory
+
+
+def _seed():
+    db = database.SessionLocal()
+    when = datetime(2026, 5, 10, 12, 0, tzinfo=main.time.TZ)
+    db.add(WeeklyMemory(
+        week_monday=main.time.week_monday(when),
+        author="Jaime",
+        text='Exportado, con "comillas"',
+        created_at=when,
+        updated_at=when,
+    ))
+    db.add(Goal(author="Gabi", text="Meta exportada", created_at=when))
+    db.add(UnlinkedMemory(author="Jaime", text="Suelto\nmultilínea", created_at=when))
+    db.commit()
+    db.close()
+
+
+def test_export_stream_formats(monkeypatch):
+    _seed()
+    # tiny chunks: exercise the incremental flushing
+    monkeypatch.setattr(export, "CHUNK_BYTES", 16)
+
+    ndjson = b"".join(export.stream("ndjson"))
+    records = [json.loads(line) for line in ndjson.splitlines()]
+    kinds = {r["type"] for r in records}
+    assert kinds == {"weekly_memory", "goal", "unlinked"}
+    assert any(r["text"] == 'Exportado, con "comillas"' for r in records)
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(export.stream("csv")).decode("utf-8"))))
+    assert len(rows) == len(records)
+    assert any(r["text"] == "Suelto\nmultilínea" for r in rows)
+
+    assert gzip.decompress(b"".join(export.stream("ndjson", gzip=True))) == ndjson
+
+
+def test_export_endpoint(client, admin_settings):
+    admin_settings(ADMIN_USER="admin")
+    token = main.create_admin_jwt("admin")
+
+    assert client.get("/admin/export").status_code == 401
+
+    resp = client.get(
+        "/admin/export",
+        params={"format": "csv", "gzip": "true"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/gzip"
+    assert ".csv.gz" in resp.headers["content-disposition"]
+    assert gzip.decompress(resp.content).startswith(b"type,id,week_monday")
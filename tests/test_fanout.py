@@ -0,0 +1,112 @@
+import sys
+import os
+import threading
+import time as _time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import emailer
+from app.fanout import UNKNOWN, fan_out
+from app.mail_transport import OutgoingEmail, SMTPTransport
+from tests.standins import SMTPStandin
+
+
+def _emails(n):
+    return [OutgoingEmail("Asunto", "Cuerpo", f"user{i}@example.com") for i in range(n)]
+
+
+def test_fan_out_runs_concurrently_up_to_the_cap():
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_send(email):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        _time.sleep(0.05)
+        with lock:
+            active -= 1
+        return email.to != "user3@example.com"
+
+    start = _time.perf_counter()
+    results = fan_out(slow_send, _emails(8), concurrency=4, timeout=2)
+    elapsed = _time.perf_counter() - start
+
+    assert peak == 4
+    assert elapsed < 0.3  # two rounds of 50 ms, not eight
+    assert [r.to for r in results] == [f"user{i}@example.com" for i in range(8)]
+    assert [r.ok for r in results] == [i != 3 for i in range(8)]
+    assert results[3].error == "send failed"
+    assert all(r.elapsed_ms >= 40 for r in results)
+
+
+def test_fan_out_reports_timeouts_as_unknown_and_exceptions():
+    release = threading.Event()
+
+    def send(email):
+        if email.to == "user0@example.com":
+            release.wait(5)
+            return True
+        if email.to == "user1@example.com":
+            raise ConnectionError("refused")
+        return True
+
+    try:
+        results = fan_out(send, _emails(3), concurrency=3, timeout=0.1)
+    finally:
+        release.set()
+    assert [(r.ok, r.error) for r in results] == [(False, UNKNOWN), (False, "refused"), (True, None)]
+    assert results[0].unknown and not results[1].unknown
+
+
+def test_fan_out_deadline_is_per_send():
+    release = threading.Event()
+
+    def send(email):
+        if email.to == "user0@example.com":
+            release.wait(5)
+        else:
+            _time.sleep(0.2)
+        return True
+
+    # user1..8 run one after another on the second worker (~1.6 s in all),
+    # each well inside its own 0.3 s but past a batch-wide 0.3 s x 5 rounds
+    try:
+        results = fan_out(send, _emails(9), concurrency=2, timeout=0.3)
+    finally:
+        release.set()
+    assert results[0].unknown
+    assert [r.ok for r in results[1:]] == [True] * 8
+
+
+def test_fan_out_stops_when_every_worker_is_stuck():
+    release = threading.Event()
+
+    def send(email):
+        release.wait(5)
+        return True
+
+    start = _time.perf_counter()
+    try:
+        results = fan_out(send, _emails(3), concurrency=2, timeout=0.1)
+    finally:
+        release.set()
+    assert _time.perf_counter() - start < 1
+    assert [r.error for r in results] == [UNKNOWN, UNKNOWN, "not sent"]
+
+
+def test_deliver_fans_out_over_pooled_smtp(monkeypatch):
+    with SMTPStandin(handshake_delay=0.05) as server:
+        transport = SMTPTransport("127.0.0.1", server.port, "from@example.com", use_tls=False, pool_size=4)
+        monkeypatch.setattr(emailer, "EMAILS_ENABLED", True)
+        monkeypatch.setattr(emailer, "_transport", transport)
+        start = _time.perf_counter()
+        results = emailer.deliver(_emails(4))
+        assert _time.perf_counter() - start < 0.15  # handshakes overlap
+        assert all(r.ok for r in results)
+        assert len(server.messages) == 4 and server.connections == 4
+        emailer.close_transport()
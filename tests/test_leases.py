@@ -0,0 +1,189 @@
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import time as _time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app import leases, migrations, scheduler
+
+
+@pytest.fixture
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'leases.db'}")
+    migrations.upgrade(eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    current = [datetime(2026, 3, 8, 9, 0, tzinfo=timezone.utc)]
+    monkeypatch.setattr(leases, "_utcnow", lambda: current[0])
+    return current
+
+
+def test_only_one_holder_until_expiry(engine, clock):
+    a = leases.LeaderLease("scheduler", ttl=60, engine=engine, holder="a")
+    b = leases.LeaderLease("scheduler", ttl=60, engine=engine, holder="b")
+    assert a.acquire_or_renew() is True
+    assert b.acquire_or_renew() is False
+
+    # a keeps renewing: b never gets in
+    clock[0] += timedelta(seconds=50)
+    assert a.acquire_or_renew() is True
+    clock[0] += timedelta(seconds=50)
+    assert b.acquire_or_renew() is False
+
+    # a crashes (stops renewing); b takes over once the lease lapses
+    clock[0] += timedelta(seconds=61)
+    assert b.acquire_or_renew() is True
+    assert a.acquire_or_renew() is False
+
+
+def test_release_hands_over_immediately(engine, clock):
+    a = leases.LeaderLease("scheduler", ttl=60, engine=engine, holder="a")
+    b = leases.LeaderLease("scheduler", ttl=60, engine=engine, holder="b")
+    assert a.acquire_or_renew()
+    a.release()
+    assert not a.is_leader
+    clock[0] += timedelta(seconds=1)
+    assert b.acquire_or_renew()
+
+
+def test_leases_are_independent_by_name(engine, clock):
+    assert leases.LeaderLease("reminders", engine=engine, holder="a").acquire_or_renew()
+    assert leases.LeaderLease("purge", engine=engine, holder="b").acquire_or_renew()
+
+
+def test_leader_only_runs_job_once_across_replicas(engine, clock):
+    runs = []
+    job = lambda: runs.append(1) or "done"
+    replicas = [
+        scheduler.leader_only(job, leases.LeaderLease("scheduler", engine=engine, holder=f"r{i}"), wait=0)
+        for i in range(3)
+    ]
+    results = [fire() for fire in replicas]
+    assert runs == [1]
+    assert results == ["done", None, None]
+
+
+def test_unreachable_database_means_not_leader(tmp_path):
+    eng = create_engine(f"sqlite:///{tmp_path / 'missing' / 'x.db'}")
+    lease = leases.LeaderLease("scheduler", engine=eng, holder="a")
+    assert lease.acquire_or_renew() is False
+
+
+def test_new_leader_runs_a_firing_the_dead_leader_missed(engine):
+    runs = []
+    # the leader took the lease and died just before the job fired
+    assert leases.LeaderLease("scheduler", ttl=0.3, engine=engine, holder="dead").acquire_or_renew()
+    survivor = leases.LeaderLease("scheduler", ttl=0.3, engine=engine, holder="survivor")
+    fire = scheduler.leader_only(lambda: runs.append(1) or "done", survivor)
+
+    start = _time.monotonic()
+    assert fire() == "done"
+    assert runs == [1]
+    assert 0.2 < _time.monotonic() - start < 1.5
+
+
+def test_non_leader_gives_up_while_leader_is_alive(engine, clock):
+    assert leases.LeaderLease("scheduler", ttl=60, engine=engine, holder="a").acquire_or_renew()
+    runs = []
+    follower = leases.LeaderLease("scheduler", ttl=60, engine=engine, holder="b")
+    fire = scheduler.leader_only(lambda: runs.append(1), follower, wait=0.1)
+    assert fire() is None and runs == []
+
+
+class _FakePostgres:
+    """Just enough of Postgres session-level advisory locks to drive LeaderLease."""
+
+    def __init__(self):
+        self.locks = {}
+        self.connections = 0
+        self.statements = []
+
+    def connect(self):
+        self.connections += 1
+        return _FakePgConnection(self)
+
+
+class _FakePgConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+
+    def execute(self, stmt, params=None):
+        if self.closed:
+            raise ConnectionError("server closed the connection")
+        sql = str(stmt)
+        self.server.statements.append(sql)
+        key = (params or {}).get("key")
+        if "pg_try_advisory_lock" in sql:
+            return _Scalar(self.server.locks.setdefault(key, self) is self)
+        if "pg_advisory_unlock" in sql:
+            return _Scalar(self.server.locks.pop(key, None) is self)
+        return _Scalar(1)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        # the server drops a session's advisory locks with it
+        self.closed = True
+        for key, owner in list(self.server.locks.items()):
+            if owner is self:
+                del self.server.locks[key]
+
+
+class _Scalar:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+@pytest.fixture
+def postgres():
+    # building the engine does not connect; the lock connection goes to the fake
+    return create_engine("postgresql+psycopg2://user:pw@localhost:5432/memories"), _FakePostgres()
+
+
+def test_postgres_lock_uses_a_dedicated_unpooled_connection(postgres):
+    pg_engine, _ = postgres
+    lease = leases.LeaderLease("scheduler", engine=pg_engine, holder="a")
+    dedicated = lease._dedicated_engine()
+    assert dedicated is not pg_engine and isinstance(dedicated.pool, NullPool)
+    assert dedicated.url == pg_engine.url
+    assert pg_engine.pool.checkedout() == 0
+
+
+def test_postgres_advisory_lock_election(postgres):
+    pg_engine, server = postgres
+    a = leases.LeaderLease("scheduler", engine=pg_engine, holder="a")
+    b = leases.LeaderLease("scheduler", engine=pg_engine, holder="b")
+    a._lock_engine = b._lock_engine = server
+
+    assert a.acquire_or_renew() is True
+    assert b.acquire_or_renew() is False
+    # renewal is a ping on the connection that holds the lock
+    assert a.acquire_or_renew() is True
+    assert server.statements[-1] == "SELECT 1"
+    assert list(server.locks) == [leases._advisory_key("scheduler")]
+
+    # a's connection dies: the server frees the lock and b takes over
+    a._conn.close()
+    assert b.acquire_or_renew() is True
+    assert a.acquire_or_renew() is False and a._conn is None
+
+    b.release()
+    assert server.locks == {} and not b.is_leader
+    assert a.acquire_or_renew() is True
@@ -0,0 +1,86 @@
+import sys
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app import emailer
+import pytest
+
+from app.mail_transport import DeliveryUnknown, OutgoingEmail, ResendTransport, SMTPTransport
+from tests.standins import ResendStandin, SMTPStandin
+
+
+def _emails(n):
+    return [OutgoingEmail(f"Asunto {i}", f"Cuerpo {i}", f"user{i}@example.com") for i in range(n)]
+
+
+def test_smtp_transport_reuses_connection():
+    with SMTPStandin() as server:
+        transport = SMTPTransport("127.0.0.1", server.port, "from@example.com", use_tls=False, pool_size=1)
+        assert transport.send_many(_emails(5)) == [True] * 5
+        assert server.connections == 1
+        assert len(server.messages) == 5 and "Cuerpo 4" in server.messages[4]
+        transport.close()
+
+
+def test_smtp_transport_reconnects_after_server_drop():
+    with SMTPStandin() as server:
+        transport = SMTPTransport("127.0.0.1", server.port, "from@example.com", use_tls=False, pool_size=1)
+        assert transport.send(_emails(1)[0])
+        # the server closes the idle connection behind our back
+        server.drop_connections()
+        assert transport.send(_emails(1)[0])
+        assert transport.connects == 2
+        transport.close()
+
+
+def test_smtp_rejected_recipient_keeps_connection_and_is_not_resent():
+    with SMTPStandin(reject_rcpt={"user0@example.com"}) as server:
+        transport = SMTPTransport("127.0.0.1", server.port, "from@example.com", use_tls=False, pool_size=1)
+        assert transport.send_many(_emails(2)) == [False, True]
+        assert server.connections == 1 and transport.connects == 1
+        assert server.commands.count("RCPT") == 2
+        assert server.commands.count("DATA") == 1 and len(server.messages) == 1
+        transport.close()
+
+
+def test_smtp_disconnect_after_data_is_not_resent():
+    with SMTPStandin(drop_after_data=True) as server:
+        transport = SMTPTransport("127.0.0.1", server.port, "from@example.com", use_tls=False, pool_size=1)
+        with pytest.raises(DeliveryUnknown):
+            transport.send(_emails(1)[0])
+        assert server.connections == 1
+        assert len(server.messages) == 1
+        transport.close()
+
+
+def test_resend_transport_batches_over_one_connection():
+    with ResendStandin() as server:
+        transport = ResendTransport("key", "from@example.com", base_url=server.url, batch_size=2)
+        assert transport.send_many(_emails(5)) == [True] * 5
+        assert transport.send(_emails(1)[0])
+        paths = [path for path, _, _ in server.requests]
+        assert paths == ["/emails/batch", "/emails/batch", "/emails/batch", "/emails"]
+        assert [len(p) for _, _, p in server.requests[:3]] == [2, 2, 1]
+        assert server.requests[0][1] == "Bearer key"
+        assert server.connections == 1
+        transport.close()
+
+
+def test_resend_errors_reported_per_message():
+    with ResendStandin(status=422) as server:
+        transport = ResendTransport("key", "from@example.com", base_url=server.url)
+        assert transport.send_many(_emails(3)) == [False] * 3
+        transport.close()
+
+
+def test_send_email_uses_shared_transport(monkeypatch):
+    with ResendStandin() as server:
+        monkeypatch.setattr(emailer, "EMAILS_ENABLED", True)
+        monkeypatch.setattr(emailer, "_transport", ResendTransport("key", "from@example.com", base_url=server.url))
+        assert emailer.send_email("Hola", "Texto", "a@example.com")
+        assert emailer.send_emails(_emails(3)) == [True] * 3
+        assert server.connections == 1
+        emailer.close_transport()
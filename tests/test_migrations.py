@@ -0,0 +1,54 @@
+import sys
+import os
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from sqlalchemy import create_engine, event, inspect, text
+
+from app import migrations
+
+
+def _indexes(engine, table):
+    return {ix["name"] for ix in inspect(engine).get_indexes(table)}
+
+
+def test_upgrade_fresh_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    assert migrations.upgrade(engine) == [v for v, _, _ in migrations.MIGRATIONS]
+    # second run is a no-op
+    assert migrations.upgrade(engine) == []
+
+    with engine.connect() as conn:
+        assert migrations.current_version(conn) == migrations.MIGRATIONS[-1][0]
+    assert "ix_goals_author_created_at_id" in _indexes(engine, "goals")
+    assert "ix_email_tokens_expires_at" in _indexes(engine, "email_tokens")
+    engine.dispose()
+
+
+def test_upgrade_when_current_only_reads_the_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    migrations.upgrade(engine)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert migrations.upgrade(engine) == []
+    assert not any(s.lstrip().upper().startswith(("CREATE", "INSERT")) for s in statements)
+    assert len(statements) <= 2
+    engine.dispose()
+
+
+def test_upgrade_adds_indexes_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    # schema as created by the old import-time create_all: tables, no extra indexes
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE goals (id INTEGER PRIMARY KEY, text TEXT NOT NULL, author VARCHAR NOT NULL, created_at DATETIME NOT NULL)"))
+        conn.execute(text("INSERT INTO goals (text, author, created_at) VALUES ('viejo', 'Jaime', '2026-01-01 10:00:00')"))
+
+    migrations.upgrade(engine)
+    assert "ix_goals_author_created_at_id" in _indexes(engine, "goals")
+    assert "ix_goals_author_created_at" not in _indexes(engine, "goals")
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM goals")).scalar() == 1
+    engine.dispose()
@@ -0,0 +1,188 @@
+import sys
+import os
+import time as _time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+
+import app.main as main
+from app import database, outbox
+from app.fanout import UNKNOWN, SendResult
+from app.mail_transport import OutgoingEmail
+from app.models import EmailOutbox
+
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    db = database.SessionLocal()
+    db.query(EmailOutbox).delete()
+    db.commit()
+    db.close()
+    yield
+
+
+def _rows():
+    db = database.SessionLocal()
+    try:
+        return db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+    finally:
+        db.close()
+
+
+def _email(i=0):
+    return OutgoingEmail(f"Asunto {i}", "Cuerpo", f"user{i}@example.com")
+
+
+def test_enqueue_dedupes_by_key():
+    assert outbox.enqueue([("k1", _email(1)), ("k2", _email(2))]) == 2
+    assert outbox.enqueue([("k1", _email(1))]) == 0
+    assert [r.dedupe_key for r in _rows()] == ["k1", "k2"]
+    assert outbox.stats()["pending"] == 2
+
+
+def test_drain_sends_and_retries_with_backoff(monkeypatch):
+    sent = []
+
+    def fake_deliver(emails):
+        sent.extend(e.to for e in emails)
+        return [SendResult(e.to, e.to != "user2@example.com", 1.0, None if e.to != "user2@example.com" else "550 mailbox unavailable") for e in emails]
+
+    monkeypatch.setattr(outbox.emailer, "deliver", fake_deliver)
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 2)
+    outbox.enqueue([("ok", _email(1)), ("bad", _email(2))])
+
+    counts = outbox.drain_once()
+    assert (counts["sent"], counts["retried"], counts["failed"]) == (1, 1, 0)
+    assert [r["to"] for r in counts["results"]] == ["user1@example.com", "user2@example.com"]
+    ok, bad = _rows()
+    assert ok.status == "sent" and ok.sent_at is not None
+    assert bad.status == "pending" and bad.attempts == 1 and bad.last_error == "550 mailbox unavailable"
+    assert outbox._utc(bad.next_attempt_at) > datetime.now(timezone.utc) + timedelta(seconds=20)
+
+    # not due yet: nothing to claim
+    assert outbox.drain_once()["results"] == []
+
+    db = database.SessionLocal()
+    db.query(EmailOutbox).filter_by(dedupe_key="bad").update({"next_attempt_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+    db.commit()
+    db.close()
+    assert outbox.drain_once()["failed"] == 1
+    assert _rows()[1].status == "failed"
+    assert sent == ["user1@example.com", "user2@example.com", "user2@example.com"]
+    assert outbox.stats()["failed"] == 1
+
+
+def test_unknown_outcome_stays_claimed_until_stale(monkeypatch):
+    monkeypatch.setattr(outbox.emailer, "deliver", lambda emails: [SendResult(e.to, False, 10.0, UNKNOWN) for e in emails])
+    outbox.enqueue([("maybe", _email(3))])
+
+    counts = outbox.drain_once()
+    assert (counts["unknown"], counts["retried"], counts["failed"]) == (1, 0, 0)
+    row = _rows()[0]
+    assert row.status == "sending" and row.attempts == 1 and row.last_error == UNKNOWN
+    # not retried by the next drain, only by the stale-claim reclaim
+    assert outbox.drain_once()["results"] == []
+    db = database.SessionLocal()
+    try:
+        later = datetime.now(timezone.utc) + timedelta(seconds=outbox.OUTBOX_CLAIM_TIMEOUT_SECONDS + 1)
+        assert len(outbox.claim(db, 10, later)) == 1
+    finally:
+        db.close()
+
+
+def test_unknown_outcomes_stop_at_max_attempts(monkeypatch):
+    delivered = []
+
+    def unknown(emails):
+        delivered.extend(e.to for e in emails)
+        return [SendResult(e.to, False, 10.0, UNKNOWN) for e in emails]
+
+    monkeypatch.setattr(outbox.emailer, "deliver", unknown)
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 3)
+    outbox.enqueue([("maybe", _email(4))])
+
+    db = database.SessionLocal()
+    try:
+        for _ in range(20):
+            outbox.drain_once()
+            # every claim goes stale before the next drain
+            db.query(EmailOutbox).update({"claimed_at": datetime.now(timezone.utc) - timedelta(days=1)})
+            db.commit()
+    finally:
+        db.close()
+    row = _rows()[0]
+    assert len(delivered) == 3
+    assert row.status == "failed" and row.attempts == 3
+
+
+def test_stale_claim_past_the_cap_is_failed_not_resent(monkeypatch):
+    monkeypatch.setattr(outbox.emailer, "deliver", lambda emails: pytest.fail("must not resend"))
+    outbox.enqueue([("crashed", _email(5))])
+    db = database.SessionLocal()
+    db.query(EmailOutbox).update({
+        "status": "sending",
+        "attempts": outbox.OUTBOX_MAX_ATTEMPTS,
+        "claimed_at": datetime.now(timezone.utc) - timedelta(days=1),
+    })
+    db.commit()
+    db.close()
+    assert outbox.drain_once()["results"] == []
+    assert _rows()[0].status == "failed"
+
+
+def test_claim_is_exclusive_and_reclaims_stale_rows():
+    outbox.enqueue([("a", _email())])
+    now = datetime.now(timezone.utc)
+    first, second = database.SessionLocal(), database.SessionLocal()
+    try:
+        assert len(outbox.claim(first, 10, now)) == 1
+        assert outbox.claim(second, 10, now) == []
+        # a worker that died mid-send leaves the row in "sending"; it is reclaimed later
+        later = now + timedelta(seconds=outbox.OUTBOX_CLAIM_TIMEOUT_SECONDS + 1)
+        reclaimed = outbox.claim(second, 10, later)
+        assert len(reclaimed) == 1 and reclaimed[0].attempts == 2
+    finally:
+        first.close()
+        second.close()
+
+
+def test_backoff_grows_and_is_capped():
+    assert outbox.backoff(1) < outbox.backoff(2) < outbox.backoff(3)
+    assert outbox.backoff(50).total_seconds() == outbox.OUTBOX_BACKOFF_MAX_SECONDS
+
+
+def test_worker_drains_in_background(monkeypatch):
+    delivered = []
+    monkeypatch.setattr(outbox.emailer, "deliver", lambda emails: [delivered.append(e.to) or SendResult(e.to, True, 1.0) for e in emails])
+    outbox.enqueue([("bg", _email(7))])
+    # the test engine is one shared connection: leave it to the worker while it runs
+    outbox.start()
+    try:
+        deadline = _time.monotonic() + 5
+        while not delivered and _time.monotonic() < deadline:
+            _time.sleep(0.02)
+    finally:
+        outbox.stop()
+    assert delivered == ["user7@example.com"]
+    assert _rows()[0].status == "sent"
+
+
+def test_send_test_emails_only_enqueues(client, monkeypatch, admin_settings):
+    admin_settings(ADMIN_USER="admin")
+
+    def no_send(emails):
+        raise AssertionError("the request must not send mail itself")
+
+    monkeypatch.setattr(outbox.emailer, "deliver", no_send)
+    headers = {"Authorization": f"Bearer {main.create_admin_jwt('admin')}"}
+    resp = client.post("/admin/send-test-emails", headers=headers)
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert {r["author"] for r in results} == set(main.AUTHORS)
+    assert all(r["ok"] for r in results)
+    assert len(_rows()) == len(results)
+    assert client.get("/admin/stats", headers=headers).json()["email_outbox"]["pending"] == len(results)
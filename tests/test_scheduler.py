@@ -0,0 +1,82 @@
+import sys
+import os
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+from sqlalchemy import event
+
+import app.main  # noqa: F401  (binds the test database)
+from app import database, scheduler
+from app.models import EmailOutbox, EmailToken, WeeklyMemory
+from app.time import TZ, week_monday
+
+SUNDAY = datetime(2026, 3, 8, 9, 0, tzinfo=TZ)
+
+
+@pytest.fixture(autouse=True)
+def clean_tables(monkeypatch):
+    monkeypatch.setattr(scheduler, "now", lambda: SUNDAY)
+    db = database.SessionLocal()
+    for model in (EmailOutbox, EmailToken, WeeklyMemory):
+        db.query(model).delete()
+    db.commit()
+    db.close()
+    yield
+
+
+def _run_with_authors(monkeypatch, n, wrote_every=3):
+    authors = [f"author{i:05d}" for i in range(n)]
+    monkeypatch.setattr(scheduler, "AUTHORS", authors)
+    monkeypatch.setattr(scheduler, "EMAIL_RECIPIENTS", {a: f"{a}@example.com" for a in authors})
+
+    monday = week_monday(SUNDAY)
+    db = database.SessionLocal()
+    db.query(EmailOutbox).delete()
+    db.query(WeeklyMemory).delete()
+    db.add_all(
+        WeeklyMemory(week_monday=monday, author=a, text="hecho", created_at=SUNDAY, updated_at=SUNDAY)
+        for a in authors[::wrote_every]
+    )
+    db.commit()
+    db.close()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(database.engine, "before_cursor_execute", listener)
+    try:
+        scheduler._send_weekly_reminders()
+    finally:
+        event.remove(database.engine, "before_cursor_execute", listener)
+    return authors, statements
+
+
+def test_reminders_skip_authors_who_already_wrote(monkeypatch):
+    authors, _ = _run_with_authors(monkeypatch, 9)
+    db = database.SessionLocal()
+    queued = sorted(r.recipient for r in db.query(EmailOutbox).all())
+    db.close()
+    missing = [a for i, a in enumerate(authors) if i % 3]
+    assert queued == [f"{a}@example.com" for a in missing]
+
+
+def test_reminder_queries_do_not_grow_with_authors(monkeypatch):
+    _, few = _run_with_authors(monkeypatch, 12)
+    authors, many = _run_with_authors(monkeypatch, 3000)
+    assert len(many) == len(few)
+
+    db = database.SessionLocal()
+    assert db.query(EmailOutbox).count() == 2000
+    assert db.query(EmailToken).count() == 8 + 2000
+    db.close()
+
+
+def test_no_tokens_when_everyone_wrote(monkeypatch):
+    _, statements = _run_with_authors(monkeypatch, 5, wrote_every=1)
+    db = database.SessionLocal()
+    assert db.query(EmailToken).count() == 0
+    db.close()
+    assert not any(s.lstrip().upper().startswith("INSERT") for s in statements)
@@ -0,0 +1,177 @@
+import sys
+import os
+from datetime import datetime
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import app.main as main
+from app import migrations, search
+from app.auth import generate_token
+from app.models import Goal, UnlinkedMemory, WeeklyMemory
+
+
+def _session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}", connect_args={"check_same_thread": False})
+    migrations.upgrade(engine)
+    return engine, sessionmaker(bind=engine)
+
+
+def test_search_ranks_and_scopes_by_author(tmp_path):
+    engine, Session = _session(tmp_path)
+    db = Session()
+    now = datetime(2026, 3, 1, 12, 0)
+    db.add_all([
+        WeeklyMemory(week_monday=datetime(2026, 2, 23), text="Fuimos a la montaña con la familia", author="Jaime", created_at=now, updated_at=now),
+        Goal(text="Subir una montaña, otra montaña más", author="Jaime", created_at=now),
+        UnlinkedMemory(text="Cena en casa", author="Jaime", created_at=now),
+        Goal(text="Montaña en invierno", author="Gabi", created_at=now),
+    ])
+    db.commit()
+
+    hits = search.search(db, "Jaime", "montana")
+    assert [h["kind"] for h in hits] == ["goal", "weekly_memory"]
+    assert hits[0]["score"] >= hits[1]["score"]
+    assert "<mark>montaña</mark>" in hits[0]["snippet"]
+    # prefix match, and Gabi's goal is never returned to Jaime
+    assert len(search.search(db, "Jaime", "mont")) == 2
+    assert len(search.search(db, "Gabi", "montaña")) == 1
+    db.close()
+    engine.dispose()
+
+
+def test_search_follows_updates_and_deletes(tmp_path):
+    engine, Session = _session(tmp_path)
+    db = Session()
+    g = Goal(text="Aprender <b>piano</b>", author="Jaime", created_at=datetime(2026, 3, 1))
+    db.add(g)
+    db.commit()
+    # stored text is escaped in the snippet
+    assert search.search(db, "Jaime", "piano")[0]["snippet"] == "Aprender &lt;b&gt;<mark>piano</mark>&lt;/b&gt;"
+
+    g.text = "Aprender guitarra"
+    db.commit()
+    assert search.search(db, "Jaime", "piano") == []
+    assert len(search.search(db, "Jaime", "guitarra")) == 1
+
+    db.delete(g)
+    db.commit()
+    assert search.search(db, "Jaime", "guitarra") == []
+    # FTS query syntax in user input is neutralised, not an error
+    assert search.search(db, "Jaime", 'NEAR( "* OR') == []
+    assert search.search(db, "Jaime", "!!!") == []
+    db.close()
+    engine.dispose()
+
+
+def test_migration_backfills_existing_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE goals (id INTEGER PRIMARY KEY, text TEXT NOT NULL, author VARCHAR NOT NULL, created_at DATETIME NOT NULL)"))
+        conn.execute(text("INSERT INTO goals (text, author, created_at) VALUES ('Correr una maratón', 'Jaime', '2026-01-01 10:00:00.000000')"))
+    migrations.upgrade(engine)
+    db = sessionmaker(bind=engine)()
+    hits = search.search(db, "Jaime", "maraton")
+    assert hits[0]["id"] == 1 and hits[0]["kind"] == "goal"
+    db.close()
+    engine.dispose()
+
+
+def test_search_endpoint(tmp_path):
+    engine, Session = _session(tmp_path)
+    db = Session()
+    db.add(Goal(text="Leer veinte libros", author="Gabi", created_at=datetime(2026, 3, 1)))
+    db.commit()
+    db.close()
+
+    def get_db():
+        s = Session()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    main.app.dependency_overrides[main.get_db] = get_db
+    try:
+        client = TestClient(main.app)
+        headers = {"Authorization": f"Bearer {generate_token('Gabi')}"}
+        r = client.get("/search", params={"q": "libros"}, headers=headers)
+        assert r.status_code == 200
+        assert r.json()[0]["snippet"] == "Leer veinte <mark>libros</mark>"
+        assert client.get("/search", params={"q": ""}, headers=headers).status_code == 422
+    finally:
+        main.app.dependency_overrides.clear()
+    engine.dispose()
+
+
+class _PostgresRecorder:
+    """Session stand-in on the Postgres dialect that records the SQL it is given."""
+
+    def __init__(self):
+        self.engine = create_engine("postgresql+psycopg2://user:pw@localhost:5432/memories")
+        self.calls = []
+
+    def get_bind(self):
+        return self.engine
+
+    def execute(self, stmt, params=None):
+        self.calls.append((str(stmt), params))
+        return self
+
+    def all(self):
+        return []
+
+
+def test_postgres_search_is_accent_insensitive_like_sqlite():
+    db = _PostgresRecorder()
+    assert search.search(db, "Jaime", "Montaña mont") == []
+    sql, params = db.calls[0]
+    assert params["tsquery"] == "montaña:* & mont:*"
+    # query, headline and the generated column all use the unaccent configuration
+    assert f"to_tsquery('{search.TS_CONFIG}'" in sql and f"ts_headline('{search.TS_CONFIG}'" in sql
+    ddl = search.postgres_ddl()
+    assert ddl[0] == "CREATE EXTENSION IF NOT EXISTS unaccent"
+    assert "WITH unaccent, spanish_stem" in ddl[1]
+    columns = [stmt for stmt in ddl if "GENERATED ALWAYS" in stmt]
+    assert len(columns) == 3 and all(f"to_tsvector('{search.TS_CONFIG}'" in stmt for stmt in columns)
+    # migration 7 rebuilds columns created with plain 'spanish'
+    assert search.postgres_rebuild_ddl()[:3] == [
+        f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector" for _, table, _, _ in search.SOURCES
+    ]
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL not set")
+def test_postgres_search_matches_unaccented_query():
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    migrations.upgrade(engine)
+    db = sessionmaker(bind=engine)()
+    goal = Goal(text="Subir una montaña", author="Jaime", created_at=datetime(2026, 3, 1, 12, 0))
+    db.add(goal)
+    db.commit()
+    try:
+        hits = search.search(db, "Jaime", "montana")
+        assert goal.id in [h["id"] for h in hits if h["kind"] == "goal"]
+        assert any("<mark>montaña</mark>" in h["snippet"] for h in hits)
+    finally:
+        db.delete(goal)
+        db.commit()
+        db.close()
+        engine.dispose()
+
+
+def test_unsupported_backend_is_reported():
+    from types import SimpleNamespace
+
+    from app import crud
+
+    db = SimpleNamespace(get_bind=lambda: SimpleNamespace(dialect=SimpleNamespace(name="mysql")))
+    with pytest.raises(search.UnsupportedBackend):
+        search.search(db, "Jaime", "piano")
+    with pytest.raises(crud.UnsupportedBackend):
+        crud.dialect_insert(db, None)
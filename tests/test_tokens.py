@@ -34,4 +34,158 @@ def test_token_endpoint(client):
     data = resp.json()
     assert data['author'] == 'Gabi'
     assert data['ok'] is True
- 
\ No newline at end of file
+ 
+
+def test_session_exchange(client, monkeypatch):
+    tok = tokens.generate_email_token('Gabi', ttl_minutes=1)
+    resp = client.post("/session", json={"token": tok})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data['author'] == 'Gabi'
+    session = data['session_token']
+
+    # the email token is spent by the exchange
+    assert client.post("/session", json={"token": tok}).status_code == 401
+
+    # the session token authenticates repeatedly without touching email_tokens
+    def no_db(token):
+        raise AssertionError("session tokens must not hit the database")
+
+    monkeypatch.setattr("app.deps.consume_email_token", no_db)
+    headers = {"Authorization": f"Bearer {session}"}
+    assert client.get("/goals", headers=headers).status_code == 200
+    assert client.get("/goals", headers=headers).status_code == 200
+
+
+def test_session_token_rejected_when_expired_or_tampered(client, admin_settings):
+    from app.auth import create_session_token
+
+    expired, _ = create_session_token('Jaime', ttl_minutes=-1)
+    assert client.get("/goals", headers={"Authorization": f"Bearer {expired}"}).status_code == 401
+
+    valid, _ = create_session_token('Jaime')
+    assert client.get("/goals", headers={"Authorization": f"Bearer {valid[:-2]}xx"}).status_code == 401
+
+    # a session token never passes as an admin JWT, even if the names collide
+    admin_settings(ADMIN_USER="Jaime")
+    assert main.verify_admin_jwt(valid) is False
+
+
+def _forbid_db(monkeypatch):
+    def no_db():
+        raise AssertionError("expected an in-memory rejection")
+
+    monkeypatch.setattr(database, "SessionLocal", no_db)
+
+
+def test_negative_cache_rejects_repeat_lookups_without_db(monkeypatch):
+    before = tokens.invalid_tokens.stats()
+    assert tokens.validate_email_token('bogus-token') is None
+
+    _forbid_db(monkeypatch)
+    assert tokens.validate_email_token('bogus-token') is None
+    assert tokens.consume_email_token('bogus-token') is None
+    assert tokens.invalid_tokens.stats()["hits"] == before["hits"] + 2
+
+
+def test_consumed_token_is_rejected_from_memory(monkeypatch):
+    tok = tokens.generate_email_token('Jaime', ttl_minutes=1)
+    assert tokens.consume_email_token(tok) == 'Jaime'
+    _forbid_db(monkeypatch)
+    assert tokens.consume_email_token(tok) is None
+
+
+def test_bloom_filter_rejects_unknown_tokens(monkeypatch):
+    live = tokens.generate_email_token('Gabi', ttl_minutes=1)
+    bloom = tokens.LiveTokenFilter(enabled=True, refresh=3600)
+    monkeypatch.setattr(tokens, "live_tokens", bloom)
+    assert tokens.validate_email_token(live) == 'Gabi'  # builds the filter from the DB
+    assert bloom.stats()["rebuilds"] == 1
+
+    # minted after the rebuild: added locally, still accepted
+    fresh = tokens.generate_email_token('Jaime', ttl_minutes=1)
+    assert tokens.validate_email_token(fresh) == 'Jaime'
+
+    _forbid_db(monkeypatch)
+    assert tokens.validate_email_token('never-issued') is None
+    assert bloom.stats()["rejections"] == 1
+
+
+def test_stale_bloom_filter_is_rebuilt_by_one_thread(monkeypatch):
+    bloom = tokens.LiveTokenFilter(enabled=True, refresh=3600)
+    bloom.rebuild()
+    bloom._built_at -= 7200
+    _forbid_db(monkeypatch)
+
+    # another thread is already rebuilding: fail open instead of querying again
+    with bloom._rebuild_lock:
+        assert bloom.might_be_live(b"never-issued") is True
+    assert bloom.stats()["rebuilds"] == 1
+
+
+def test_ttl_cache_and_bloom_filter():
+    from app.cache import BloomFilter, TTLCache
+
+    cache = TTLCache(max_entries=2, ttl=-1)
+    cache.set(b"k", True)
+    assert cache.get(b"k") is None  # already expired
+
+    bloom = BloomFilter(1000, 0.01)
+    keys = [str(i).encode() for i in range(1000)]
+    for k in keys:
+        bloom.add(k)
+    assert all(k in bloom for k in keys)
+    false_positives = sum(str(i).encode() in bloom for i in range(1000, 11000))
+    assert false_positives < 300
+
+
+def test_purge_email_tokens_in_batches():
+    from app.models import EmailToken
+
+    now = datetime.now(timezone.utc)
+    db = database.SessionLocal()
+    db.query(EmailToken).delete()
+    db.add_all(
+        [EmailToken(token=f"old-{i}", author='Jaime', expires_at=now - timedelta(days=2), used=0) for i in range(5)]
+        + [EmailToken(token='used', author='Jaime', expires_at=now + timedelta(hours=1), used=1),
+           EmailToken(token='live', author='Gabi', expires_at=now + timedelta(hours=1), used=0)]
+    )
+    db.commit()
+    db.close()
+
+    # retention keeps tokens that expired less than 3 days ago, and used ones
+    assert tokens.purge_email_tokens(retention_minutes=3 * 24 * 60) == 0
+    assert tokens.purge_email_tokens(retention_minutes=0, batch_size=2, max_batches=1) == 2
+    db = database.SessionLocal()
+    # the indexed expired range goes first; used tokens wait for the second pass
+    assert db.query(EmailToken).filter_by(token='used').count() == 1
+    db.close()
+    assert tokens.purge_email_tokens(retention_minutes=0, batch_size=2) == 4
+
+    db = database.SessionLocal()
+    assert [t.token for t in db.query(EmailToken).all()] == ['live']
+    db.close()
+    assert tokens.validate_email_token('live') == 'Gabi'
+
+
+def test_generate_email_tokens_single_insert(monkeypatch):
+    from sqlalchemy import event
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(database.engine, "before_cursor_execute", listener)
+    try:
+        minted = tokens.generate_email_tokens(['Jaime', 'Gabi', 'Jaime'], ttl_minutes=1)
+    finally:
+        event.remove(database.engine, "before_cursor_execute", listener)
+    assert len(set(minted)) == 3
+    assert sum(s.lstrip().upper().startswith("INSERT") for s in statements) == 1
+    assert [tokens.validate_email_token(t) for t in minted] == ['Jaime', 'Gabi', 'Jaime']
+
+
+def test_generate_email_tokens_retries_collisions(monkeypatch):
+    taken = tokens.generate_email_token('Jaime', ttl_minutes=1)
+    fresh = iter([taken, 'discarded', 'collision-free-1', 'collision-free-2'])
+    monkeypatch.setattr(tokens.secrets, "token_urlsafe", lambda n: next(fresh))
+    # first batch hits the unique index, second batch is minted whole
+    assert tokens.generate_email_tokens(['Gabi', 'Jaime'], ttl_minutes=1) == ['collision-free-1', 'collision-free-2']